@@ -3,17 +3,25 @@ from fastapi.middleware.cors import CORSMiddleware
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime, timedelta
 import logging
 import signal
 import sys
  
 from scheduler import CallAnalysisScheduler 
-from src.routes import audio, call_analysis, auth, call_details
-from src.database.database import Base, engine
+from src.routes import audio, call_analysis, auth, call_details, health, jobs
+from src.database.database import Base, apply_schema_upgrades, engine
+from src.services.model_registry import model_registry
+from src.services import ringcentral
+from src.services.call_log_sync import run_call_log_sync
+from src.services.preprocessing import preprocessing_service
+from src.services.storage import run_storage_janitor
+from src.config.pydantic_config import settings
  
 
 Base.metadata.create_all(bind=engine)
+apply_schema_upgrades(engine)
  
 
 logging.basicConfig(level=logging.INFO)
@@ -40,8 +48,18 @@ app.include_router(auth.router)
 app.include_router(call_details.router)
 app.include_router(audio.router)
 app.include_router(call_analysis.router)
+app.include_router(health.router)
+app.include_router(jobs.router)
  
 
+@app.on_event("startup")
+def warm_up_models():
+    # Non-blocking: the API serves /auth and /call_details right away, /health/ready reports progress
+    if settings.model_warmup_on_startup and settings.inference_mode == "inline":
+        model_registry.warm_up_in_background(audio.serving_models())
+        logger.info("Started background model warm-up.")
+
+
 @app.get("/")
 async def root():
     return {
@@ -50,16 +68,42 @@ async def root():
     }
  
 
-scheduler_instance = CallAnalysisScheduler()
+scheduler_instance = None
+
+
+def run_daily_analysis():
+    # Built on the job thread: it opens a DB session and may refresh the RingCentral token,
+    # which should not delay the API coming up (or stop it when no token is stored yet)
+    global scheduler_instance
+    if scheduler_instance is None:
+        scheduler_instance = CallAnalysisScheduler()
+    scheduler_instance.run_daily_analysis()
+
+
 background_scheduler = BackgroundScheduler()
 
 try:
     startup_trigger = DateTrigger(run_date=datetime.now() + timedelta(seconds=5))
-    background_scheduler.add_job(scheduler_instance.run_daily_analysis, startup_trigger)
+    background_scheduler.add_job(run_daily_analysis, startup_trigger)
     logger.info("Scheduled startup job for daily call analysis.")  
 except Exception as e:
     logger.error(f"Failed to schedule startup job: {e}") 
 
+try:
+    janitor_trigger = IntervalTrigger(minutes=settings.storage_janitor_interval_minutes)
+    background_scheduler.add_job(run_storage_janitor, janitor_trigger, max_instances=1, coalesce=True)
+    logger.info("Scheduled storage janitor job.")
+except Exception as e:
+    logger.error(f"Failed to schedule storage janitor job: {e}")
+
+if settings.call_log_sync_interval_minutes > 0:
+    try:
+        call_log_trigger = IntervalTrigger(minutes=settings.call_log_sync_interval_minutes)
+        background_scheduler.add_job(run_call_log_sync, call_log_trigger, max_instances=1, coalesce=True)
+        logger.info("Scheduled call log sync job.")
+    except Exception as e:
+        logger.error(f"Failed to schedule call log sync job: {e}")
+
 try:
     background_scheduler.start()
     logger.info("Background scheduler started.") 
@@ -70,6 +114,8 @@ def shutdown(signal_received, frame):
     try:
         logger.info("Signal received. Shutting down scheduler and app...")
         background_scheduler.shutdown(wait=False)
+        preprocessing_service.shutdown()
+        ringcentral.close_session()
         logger.info("Scheduler shut down cleanly.")  
     except Exception as e:
         logger.error(f"Error during shutdown: {e}") 
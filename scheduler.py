@@ -1184,10 +1184,12 @@ import sys
 import logging
 import requests
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 import base64
 from sqlalchemy.orm import Session
+from sqlalchemy import select, union
+from sqlalchemy.dialects.postgresql import insert
 import time
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -1200,12 +1202,16 @@ from src.utils.google_sheets_reader import fetch_sheet1_data
 from dateutil import parser
 from dateutil import tz
 from src.routes.call_analysis import query_ollama_mistral
-import requests
-import certifi
 from src.config.log_config import logger
 from src.database.database import get_db, SessionLocal
-from src.models.model import Analysis, RecordingDetail, Audio, TokenStore
-from src.routes.audio import upload_audio
+from src.models.model import Analysis, RecordingDetail, Audio, TokenStore, InferenceJob, SkippedRecording
+from src.config.pydantic_config import settings
+from src.services import pipeline, ringcentral
+from src.services.pipeline import RecordingJob, Stage, StagedPipeline
+from src.services.preprocessing import preprocessing_service
+from src.services.call_log_sync import call_log_records_since, sync_call_log
+from src.services.extension_directory import extension_directory_stats, lookup_extension_number
+from src.utils.voicemail import load_voicemail_matcher
  
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -1216,9 +1222,10 @@ class CallAnalysisScheduler:
         self.db = SessionLocal()
         self.token = self._get_valid_token()
  
-        self.session = requests.Session()
- 
         self.rep_call_counts_total = {}
+
+        self.voicemail_matcher = load_voicemail_matcher(settings.voicemail_indicators_file)
+        logger.info(f"Loaded {len(self.voicemail_matcher.phrases)} voicemail indicator phrases")
        
     def _get_valid_token(self):
         """Get a valid access token, refreshing if necessary"""
@@ -1256,7 +1263,7 @@ class CallAnalysisScheduler:
                 "refresh_token": token_record.refresh_token
             }
            
-            response = requests.post(token_url, headers=headers, data=data)
+            response = ringcentral.request("POST", token_url, headers=headers, data=data)
            
             if response.status_code != 200:
                 logger.error(f"Failed to refresh token: {response.json()}")
@@ -1279,19 +1286,14 @@ class CallAnalysisScheduler:
        
     def _make_authorized_request(self, method, url, headers=None, **kwargs):
             """Make authorized requests and refresh token if expired"""
-            if headers is None:
-                headers = {}
-            headers["Authorization"] = f"Bearer {self.token}"
-           
-            response = requests.request(method, url, headers=headers, **kwargs)
+            response = ringcentral.request(method, url, access_token=self.token, headers=headers, **kwargs)
  
             
             if response.status_code in [400, 401] and "token" in response.text.lower():
                 logger.warning("Access token expired during request. Refreshing and retrying...")
                 token_record = self.db.query(TokenStore).first()
                 if self._refresh_token(token_record):
-                    headers["Authorization"] = f"Bearer {self.token}"
-                    response = requests.request(method, url, headers=headers, **kwargs,verify=certifi.where())
+                    response = ringcentral.request(method, url, access_token=self.token, headers=headers, **kwargs)
            
             return response
  
@@ -1299,47 +1301,16 @@ class CallAnalysisScheduler:
  
         
     def fetch_recent_recordings(self , hours=12):
-            """Fetch recent call recordings from RingCentral (filtered + total counts)"""
+            """Sync new call-log records from RingCentral, then read the window from Postgres (filtered + total counts)"""
             try:
-                
-                date_from = (datetime.utcnow() - timedelta(hours=hours)).isoformat() + "Z"
-                date_to = datetime.utcnow().isoformat() + "Z"
- 
-                base_url = "https://platform.ringcentral.com/restapi/v1.0/account/~/call-log"
-                headers = {"Authorization": f"Bearer {self.token}"}
-                params = {
-                    "withRecording": "true",
-                    "perPage": 100,
-                    "dateFrom": date_from,
-                    "dateTo": date_to,
-                    "view": "Detailed"
-                }
- 
-                all_records = []
-                call_log_url = base_url
- 
-                while call_log_url:
-                    response = self._make_authorized_request("GET", call_log_url, params=params)
-                    time.sleep(5)
- 
-                    if response.status_code != 200:
-                        logger.error(f"Failed to fetch recordings: {response.json()}")
-                        break
- 
-                    response_json = response.json()
-                    records = response_json.get("records", [])
-                    all_records.extend(records)
- 
-                    
-                    next_page_uri = response_json.get("navigation", {}).get("nextPage", {}).get("uri")
-                    if next_page_uri:
-                        if next_page_uri.startswith("http"):
-                            call_log_url = next_page_uri
-                        else:
-                            call_log_url = f"https://platform.ringcentral.com{next_page_uri}"
-                        params = None
-                    else:
-                        break
+                try:
+                    sync_call_log(self.db, self._make_authorized_request, initial_hours=hours)
+                except Exception as e:
+                    # Records synced by earlier runs are still usable
+                    logger.error(f"Call log sync failed, using previously synced records: {str(e)}")
+
+                since = datetime.now(timezone.utc) - timedelta(hours=hours)
+                all_records = call_log_records_since(self.db, since)
  
                 
                 rep_call_counts_total = {}
@@ -1372,188 +1343,162 @@ class CallAnalysisScheduler:
  
  
     def get_extension_number_from_id(self, extension_id):
+        """Extension number for a RingCentral extension id, served from the cached extension directory"""
+        return lookup_extension_number(self.db, self._make_authorized_request, extension_id)
+
+    def find_known_recording_ids(self, recording_ids):
+        """Recording IDs that already have audio, were skipped by the precheck or have an active inference job, in one query"""
+        if not recording_ids:
+            return set()
+
+        processed = select(Audio.recording_id).where(Audio.recording_id.in_(recording_ids))
+        skipped = select(SkippedRecording.recording_id).where(SkippedRecording.recording_id.in_(recording_ids))
+        in_flight = select(InferenceJob.recording_id).where(
+            InferenceJob.recording_id.in_(recording_ids),
+            InferenceJob.status.in_(("queued", "running"))
+        )
+        return set(self.db.execute(union(processed, skipped, in_flight)).scalars())
+
+    def save_recording_details(self, recordings):
+        """Upsert RecordingDetail rows for all new recordings in a single statement"""
+        rows = []
+        for recording_data in recordings:
+            extension_id = recording_data.get("from", {}).get("extensionId")
+            rows.append({
+                "recording_id": recording_data["recording"]["id"],
+                "phone_number": recording_data.get("to", {}).get("phoneNumber"),
+                "username": recording_data.get("from", {}).get("name"),
+                "start_time": recording_data.get("startTime"),
+                "duration": recording_data.get("duration", 0),
+                "extension_number": self.get_extension_number_from_id(extension_id) if extension_id else None,
+            })
+        if not rows:
+            return
+
+        # Earlier runs may have left a detail row for a recording that never got its audio
+        statement = insert(RecordingDetail).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[RecordingDetail.recording_id],
+            set_={
+                column: statement.excluded[column]
+                for column in ("phone_number", "username", "start_time", "duration", "extension_number")
+            }
+        )
+        self.db.execute(statement)
+        self.db.commit()
+
+    def prepare_recordings(self, recordings):
+        """Skip recordings that were already processed or are in flight and save RecordingDetail for new ones"""
+        candidates = {}
+        for recording_data in recordings:
+            recording_id = (recording_data.get("recording") or {}).get("id")
+            if recording_id and recording_id not in candidates:
+                candidates[recording_id] = recording_data
+
         try:
-            url = f"https://platform.ringcentral.com/restapi/v1.0/account/~/extension/{extension_id}"
-            response = self._make_authorized_request("GET", url)
-           
-            if response.status_code == 200:
-                return response.json().get("extensionNumber")
-            else:
-                logger.warning(f"Unexpected status code {response.status_code} while fetching extension number for ID {extension_id}")
-                return None
- 
-        except Exception as e:
-            logger.warning(f"Failed to fetch extension number for ID {extension_id}: {e}")
-            return None
-       
-   
- 
-    def is_voicemail_call(self, full_transcript: str) -> bool:
-        """
-        Detects whether a transcript contains indications of voicemail, IVR,
-        virtual assistant, or other automated system messages.
-       
-        Returns True if any known indicators are found in the transcript.
-        """
-        if not full_transcript or not full_transcript.strip():
-            return False  
- 
-        
-        transcript_lower = full_transcript.lower()
- 
-        voicemail_indicators = [
-            
-            "forwarded to voicemail",
-            "person you're trying to reach is not available",
-            "please leave your name number in a short message",
-            "the person you are trying to reach is not available",
-            "at the tone, please record your message",
-            "when you have finished recording",
-            "leave a message after the beep",
-            "could you transfer this call",
-            "please leave your message",
-            "mailbox is full",
-            "subscriber is not available",
-            "your call has been forwarded to",
-            "virtual calling assistant recording this call",
-            "please keep holding. to connect your call",
- 
-            
-            "google voice subscriber",
-            "google virtual assistant",
-            "google voice will try to connect you",
-            "you've reached the google voice mailbox",
-            "please enter verification code",
-            "please press",
- 
-            
-            "press 1 for",
-            "press any key to continue",
-            "to speak with a representative",
-            "please hold while we connect your call",
-            "please select from the following options",
- 
-            
-            "call is being forwarded",
-            "your call is being connected",
-            "transferring your call",
- 
-            
-            "thank you for calling",
-            "you have reached the office of",
-            "our office is currently closed",
-            "business hours are",
-            "to leave a message"
-        ]
- 
-        
-        for phrase in voicemail_indicators:
-            if phrase in transcript_lower:
-                return True
- 
-        return False
- 
-       
-    def process_recording(self, recording_data):
-        """Process a single recording: save details, upload audio, trigger analysis"""
-        try:
-            recording_info = recording_data.get("recording")
-            if not recording_info:
-                return False
-               
-            recording_id = recording_info.get("id")
-           
-            
-            existing_audio = self.db.query(Audio).filter_by(recording_id=recording_id).first()
-            if existing_audio:
+            known_ids = self.find_known_recording_ids(list(candidates))
+            for recording_id in known_ids:
                 logger.info(f"Recording {recording_id} already processed, skipping")
-                return False
-       
-            start_time_utc = recording_data.get("startTime")
-            print("utc",start_time_utc)
- 
- 
-           
- 
-            
-            extension_id = recording_data.get("from", {}).get("extensionId")
-            extension_number = None
-            if extension_id:
-                extension_number = self.get_extension_number_from_id(extension_id)  
-            
-            recording_detail = RecordingDetail(
-                recording_id=recording_id,
-                phone_number=recording_data.get("to", {}).get("phoneNumber"),
-                username=recording_data.get("from", {}).get("name"),
-                start_time=start_time_utc,
-                duration=recording_data.get("duration", 0),
-                extension_number=extension_number
- 
-            )
-            self.db.add(recording_detail)
-            self.db.commit()
-           
-            
-            content_uri = f"https://platform.ringcentral.com/restapi/v1.0/account/~/recording/{recording_id}/content"
-           
-            
-           
-            headers = {"Authorization": f"Bearer {self.token}"}
-            response = requests.post(
-                "http://127.0.0.1:8004/audio/upload",  
-                json={"contentUri": content_uri, "contentType": "audio/mpeg"},
-                headers=headers
-            )
- 
- 
-           
-            if response.status_code != 200:
-                logger.error(f"Failed to upload recording {recording_id}: {response.text}")
-                return False
-               
-            audio_id = response.json().get("audio_id")
-           
-            
-            diarize_response = requests.get(
-                f"http://127.0.0.1:8004/audio/diarize/{audio_id}",
-                headers=headers
-            )
-           
-            if diarize_response.status_code != 200:
-                logger.error(f"Failed to diarize recording {recording_id}: {diarize_response.text}")
-                return False
-           
-            full_transcript = diarize_response.json().get("full_transcript", "")
- 
-            
-            if self.is_voicemail_call(full_transcript):
-                logger.info(f"Recording {recording_id} is identified as voicemail. Skipping analysis.")
-                return False
-               
-     
-            
-            analysis_response = requests.post(
-                "http://127.0.0.1:8004/call-analysis/",
-                headers={
-                    "audio-id": audio_id  
-                }
-            )
- 
-            if analysis_response.status_code != 200:
-                logger.error(f"Failed to analyze recording {recording_id}: {analysis_response.text}")
-                return False
- 
-               
-            logger.info(f"Successfully processed recording {recording_id}")
-            return True
-           
- 
-           
+
+            new_recordings = [data for rid, data in candidates.items() if rid not in known_ids]
+            self.save_recording_details(new_recordings)
+
         except Exception as e:
-            logger.error(f"Error processing recording: {str(e)}")
-            return False
- 
- 
+            logger.error(f"Error preparing recordings: {str(e)}")
+            self.db.rollback()
+            return []
+
+        logger.info(f"Prepared {len(new_recordings)} new recordings ({len(known_ids)} already processed or in flight)")
+        return [
+            RecordingJob(recording_id=data["recording"]["id"], recording_data=data)
+            for data in new_recordings
+        ]
+
+    def _download_stage(self, job, db):
+        job.downloaded = pipeline.download(job.recording_id, self.token, db)
+        return job
+
+    def _precheck_stage(self, job, db):
+        """Drop voicemail/IVR calls based on the opening seconds, before the expensive stages"""
+        if not settings.voicemail_precheck_enabled:
+            return job
+        match = self.voicemail_matcher.find_first(pipeline.opening_transcript(job.downloaded))
+        if match:
+            logger.info(f"Recording {job.recording_id} matched voicemail indicator '{match.phrase}' at offset {match.start} of its opening. Skipping.")
+            job.downloaded.file_path.unlink(missing_ok=True)
+            # No Audio row will exist for this call; remember the skip so the next run's prefilter drops it
+            db.merge(SkippedRecording(
+                recording_id=job.recording_id,
+                reason="voicemail_precheck",
+                detail=match.phrase,
+                skipped_at=datetime.utcnow()
+            ))
+            db.commit()
+            return None
+        return job
+
+    def _preprocess_stage(self, job, db):
+        job.audio_id = pipeline.preprocess(job.downloaded, db).audio_id
+        return job
+
+    def _asr_stage(self, job, db):
+        diarization = pipeline.diarize(job.audio_id, db)
+        job.full_transcript = diarization.full_transcript or ""
+        return job
+
+    def _voicemail_stage(self, job, db):
+        match = self.voicemail_matcher.find_first(job.full_transcript)
+        if match:
+            logger.info(f"Recording {job.recording_id} is identified as voicemail ('{match.phrase}' at offset {match.start}). Skipping analysis.")
+            return None
+        return job
+
+    def _analysis_stage(self, job, db):
+        analysis = pipeline.analyze(job.audio_id, db)
+        if analysis.status != "completed":
+            logger.error(f"Failed to analyze recording {job.recording_id}: {analysis.analysis}")
+            return None
+        logger.info(f"Successfully processed recording {job.recording_id}")
+        return job
+
+    def build_pipeline(self):
+        """Stages of the per-recording pipeline, each with its configured worker count"""
+        return StagedPipeline(
+            [
+                Stage("download", self._download_stage, settings.pipeline_download_workers),
+                Stage("precheck", self._precheck_stage, settings.pipeline_precheck_workers),
+                Stage("preprocess", self._preprocess_stage,
+                      settings.pipeline_preprocess_workers or preprocessing_service.max_workers),
+                Stage("asr", self._asr_stage, settings.pipeline_asr_workers),
+                Stage("voicemail", self._voicemail_stage, settings.pipeline_voicemail_workers),
+                Stage("analysis", self._analysis_stage, settings.pipeline_analysis_workers),
+            ],
+            queue_size=settings.pipeline_queue_size
+        )
+
+    def log_precheck_savings(self, staged_pipeline):
+        """Report how many calls the voicemail precheck skipped and the stage time it saved"""
+        stats = staged_pipeline.stats
+        skipped = stats["precheck"].dropped
+        if not skipped:
+            logger.info("Voicemail precheck skipped 0 recordings")
+            return
+
+        # Skipped calls would have gone through preprocess and ASR; use this run's average cost
+        saved_per_call = 0.0
+        for name in ("preprocess", "asr"):
+            handled = stats[name].processed + stats[name].dropped + stats[name].failed
+            if handled:
+                saved_per_call += stats[name].busy_seconds / handled
+
+        precheck_handled = stats["precheck"].processed + skipped + stats["precheck"].failed
+        precheck_cost = stats["precheck"].busy_seconds / precheck_handled
+        logger.info(
+            f"Voicemail precheck skipped {skipped}/{precheck_handled} recordings, "
+            f"saving ~{skipped * saved_per_call:.0f}s of preprocess/ASR time "
+            f"(precheck costs {precheck_cost:.1f}s per recording)"
+        )
+
     def summarize_deduction_explanations(self, explanation_text: str) -> str:
         """
         Use Ollama Mistral to generate a short summary of key deduction reasons
@@ -1598,17 +1543,18 @@ class CallAnalysisScheduler:
             processed_recordings = []
             recording_ids_by_rep = defaultdict(set)
  
-            for recording in recordings:
-                rep_name = recording.get("from", {}).get("name", "Unknown")
-                recording_id = recording.get("recording", {}).get("id")
- 
-                if not recording_id:
-                    continue
- 
-                if self.process_recording(recording):
-                    recording_ids_by_rep[rep_name].add(recording_id)
-                    processed_recordings.append(recording)
-                    time.sleep(1)
+            jobs = self.prepare_recordings(recordings)
+            logger.info(f"Extension directory: {extension_directory_stats()}")
+
+            # Download/preprocess of later recordings overlaps ASR and LLM of earlier ones
+            staged_pipeline = self.build_pipeline()
+            completed_jobs = staged_pipeline.run(jobs)
+            self.log_precheck_savings(staged_pipeline)
+
+            for job in completed_jobs:
+                rep_name = job.recording_data.get("from", {}).get("name", "Unknown")
+                recording_ids_by_rep[rep_name].add(job.recording_id)
+                processed_recordings.append(job.recording_data)
  
             logger.info(f"Processed {len(processed_recordings)} recordings.")
  
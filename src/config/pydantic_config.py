@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -12,6 +13,110 @@ class Settings(BaseSettings):
     google_service_account_file: str
     google_spreadsheet_id: str 
 
+    # "single_pass" reuses one word-timestamped Whisper pass for the full
+    # transcript and the diarized segments, "per_segment" re-runs Whisper per turn
+    diarize_transcription_mode: str = "single_pass"
+    # Whisper batching: max segments per generate call and max seconds of audio per batch
+    whisper_batch_size: int = 8
+    whisper_max_batch_seconds: float = 240.0
+
+    # Scheduler pipeline: worker threads per stage (at least 1) and bounded queue size between stages
+    pipeline_download_workers: int = 2
+    pipeline_preprocess_workers: int = 0  # 0 = one per preprocessing pool process
+    pipeline_asr_workers: int = 1
+    pipeline_precheck_workers: int = 1
+    pipeline_voicemail_workers: int = 1
+    pipeline_analysis_workers: int = 1
+    pipeline_queue_size: int = 4
+
+    # Cheap voicemail/IVR check on the opening seconds before the expensive stages
+    voicemail_precheck_enabled: bool = True
+    voicemail_precheck_model: str = "openai/whisper-base.en"
+    voicemail_precheck_seconds: float = 20.0
+    # Phrase list for voicemail/IVR detection; defaults to src/config/voicemail_indicators.txt
+    voicemail_indicators_file: Optional[str] = None
+
+    # "structured" constrains Ollama to the CallAnalysisRubric JSON schema,
+    # "freeform" keeps the old free-text prompt and regex fallback parser
+    analysis_output_mode: str = "structured"
+    analysis_max_repair_attempts: int = 2
+
+    # Persistent cache of LLM analyses keyed by conversation/prompt/model hash
+    analysis_cache_enabled: bool = True
+    analysis_cache_ttl_hours: float = 720.0
+    analysis_cache_max_entries: int = 5000
+
+    # Streaming recording downloads
+    download_connect_timeout_seconds: float = 10.0
+    download_read_timeout_seconds: float = 60.0
+    download_max_retries: int = 3
+    download_backoff_seconds: float = 1.0
+    download_max_connections: int = 20
+    download_chunk_size: int = 65536
+
+    # Preprocessing process pool size; 0 = one process per CPU core
+    preprocess_workers: int = 0
+    # "streaming" denoises in overlapping blocks with bounded memory; "full" runs noisereduce on the whole call
+    preprocess_mode: str = "streaming"
+    preprocess_block_seconds: float = 37.5
+
+    # In-memory handoff of preprocessed waveforms to diarization (inline inference mode only); 0 disables it
+    waveform_cache_max_mb: float = 512.0
+
+    # "inline": the API process runs diarization/analysis itself; "queue": it enqueues jobs for worker.py
+    inference_mode: str = "inline"
+    job_max_attempts: int = 3
+    job_lease_seconds: float = 300.0
+    job_heartbeat_seconds: float = 30.0
+    job_poll_seconds: float = 2.0
+    job_wait_timeout_seconds: float = 3600.0
+
+    # Load models on a background thread at API startup (otherwise on first use)
+    model_warmup_on_startup: bool = True
+
+    # ASR backend: "transformers", "transformers-int8" (torch dynamic quantization) or "faster-whisper" (CTranslate2)
+    asr_backend: str = "transformers"
+    asr_model: str = "openai/whisper-medium"
+    faster_whisper_model: str = "medium"
+    faster_whisper_compute_type: str = "int8"
+    faster_whisper_beam_size: int = 1
+    asr_cpu_threads: int = 0  # 0 = library default
+
+    # Voice activity detection for Whisper windows (energy threshold above the noise floor, in dB)
+    vad_enabled: bool = True
+    vad_threshold_db: float = 12.0
+    vad_min_peak_db: float = -60.0  # clips whose loudest frame stays below this hold no speech
+    vad_min_silence_seconds: float = 0.3
+    vad_min_speech_seconds: float = 0.25
+    vad_pad_seconds: float = 0.2
+
+    # Audio storage: preprocessed format ("flac" or "wav", both 16-bit), archive tier and janitor budget
+    preprocessed_audio_format: str = "flac"
+    storage_archive_codec: str = "opus"  # "opus" needs ffmpeg; "move" keeps the original bytes
+    storage_archive_bitrate_kbps: int = 24
+    storage_archive_after_hours: float = 24.0
+    storage_retention_days: float = 90.0  # 0 keeps archived originals forever
+    storage_max_gb: float = 0.0  # 0 disables the size budget
+    storage_janitor_interval_minutes: int = 60
+    storage_janitor_batch_size: int = 500
+
+
+    # RingCentral extension directory (id -> extension number), bulk-loaded and refreshed after the TTL
+    extension_directory_ttl_hours: float = 24.0
+    extension_directory_retry_minutes: float = 15.0  # wait after a failed bulk refresh
+
+    # RingCentral API client: pooled connections, request timeout and retries after a 429
+    ringcentral_max_connections: int = 10
+    ringcentral_timeout_seconds: float = 30.0
+    ringcentral_max_retries: int = 3
+
+    # Incremental call-log sync: first-run lookback, page size, and how far before the previous run's
+    # start time to re-fetch (longest expected call + delay before RingCentral publishes its log entry)
+    call_log_sync_initial_hours: float = 12.0
+    call_log_sync_max_call_minutes: float = 180.0
+    call_log_sync_publish_lag_minutes: float = 30.0
+    call_log_sync_page_size: int = 1000
+    call_log_sync_interval_minutes: int = 15  # background sync for /call_details lookups; 0 disables it
 
     class Config:
         env_file = '.env'
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from src.config.pydantic_config import settings
@@ -11,6 +11,18 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# create_all only creates missing tables; columns added to existing tables are patched here.
+# Every statement must be idempotent, it runs on each startup.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE audios ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_audios_content_hash ON audios (content_hash)",
+]
+
+def apply_schema_upgrades(bind=engine):
+    with bind.begin() as connection:
+        for statement in SCHEMA_UPGRADES:
+            connection.execute(text(statement))
+
 def get_db():
     db = SessionLocal()
     try:
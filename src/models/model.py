@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, JSON, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, JSON, DateTime, Text, Index, text
 from sqlalchemy.orm import relationship
 import datetime
 from datetime import datetime
@@ -16,6 +16,8 @@ class Audio(Base):
     full_transcript = Column(Text, nullable=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
     recording_id = Column(String, unique=True, nullable=False)
+    # SHA-256 of the downloaded bytes; rows with the same hash share one preprocessed file
+    content_hash = Column(String(64), index=True, nullable=True)
     
     
     # Relationships
@@ -89,6 +91,16 @@ class RecordingDetail(Base):
     extension_number = Column(String, nullable=True)
 
 
+class SkippedRecording(Base):
+    __tablename__ = "skipped_recordings"
+
+    # Recordings dropped before preprocessing (no Audio row), so later runs do not download them again
+    recording_id = Column(String, primary_key=True)
+    reason = Column(String, nullable=False)  # e.g. "voicemail_precheck"
+    detail = Column(Text, nullable=True)
+    skipped_at = Column(DateTime, default=datetime.utcnow)
+
+
 class TokenStore(Base):
     __tablename__ = "token_store"
     
@@ -100,4 +112,75 @@ class TokenStore(Base):
     token_type = Column(String, default="Bearer")
     expires_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ExtensionDirectoryEntry(Base):
+    __tablename__ = "extension_directory"
+
+    extension_id = Column(String, primary_key=True)  # RingCentral extension id
+    extension_number = Column(String, nullable=True)
+    name = Column(String, nullable=True)
+    status = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class CallLogRecord(Base):
+    __tablename__ = "call_log_records"
+
+    id = Column(String, primary_key=True)  # RingCentral call-log record id
+    recording_id = Column(String, index=True, nullable=True)
+    start_time = Column(DateTime(timezone=True), index=True)
+    direction = Column(String, nullable=True)
+    duration = Column(Float, nullable=True)
+    from_name = Column(String, nullable=True)
+    from_extension_id = Column(String, nullable=True)
+    to_phone_number = Column(String, nullable=True)
+    record = Column(JSON)  # full "Detailed" view as returned by the API
+    synced_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SyncState(Base):
+    __tablename__ = "sync_state"
+
+    name = Column(String, primary_key=True)  # e.g. "call_log"
+    watermark = Column(DateTime(timezone=True), nullable=True)  # start of the last complete sync run
+    last_run_at = Column(DateTime, nullable=True)
+    last_record_count = Column(Integer, default=0)
+
+class LLMAnalysisCache(Base):
+    __tablename__ = "llm_analysis_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # sha256 of conversation + prompt version + model + options
+    model = Column(String)
+    prompt_version = Column(String)
+    raw_response = Column(Text)
+    parsed_analysis = Column(JSON)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class InferenceJob(Base):
+    __tablename__ = "inference_jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # "diarize" | "analyze"
+    key = Column(String, nullable=False)  # dedup key, e.g. "diarize:<audio_id>"
+    audio_id = Column(String, index=True, nullable=True)
+    recording_id = Column(String, index=True, nullable=True)
+    status = Column(String, default="queued", nullable=False)  # queued | running | succeeded | failed
+    payload = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    worker_id = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # At most one queued/running job per key; finished jobs keep their history
+        Index("uq_inference_jobs_active_key", "key", unique=True, postgresql_where=text("status IN ('queued', 'running')")),
+        Index("ix_inference_jobs_status_created", "status", "created_at"),
+    )
@@ -1,20 +1,18 @@
 import os
+import time
 import uuid
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass
 from fastapi import APIRouter, HTTPException, Depends
-import torch
-import librosa
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 import numpy as np
-from transformers import WhisperProcessor, WhisperForConditionalGeneration
-import noisereduce as nr
-import soundfile as sf
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 import os
 from fastapi import APIRouter, HTTPException, Depends, Body
 from sqlalchemy.orm import Session
-import requests
 import uuid
 from pathlib import Path
 from datetime import datetime
@@ -22,8 +20,20 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import re
 from src.config.log_config import logger
 from src.utils.utils import refresh_ringcentral_token
+from src.utils.http_download import stream_download
 from datetime import datetime
+from src.config.pydantic_config import settings
 from src.database.database import get_db
+from src.services import ringcentral, storage
+from src.services.asr_backends import ASR_MODEL_KEY, get_asr_backend
+from src.services.job_queue import enqueue_job, job_summary
+from src.services.content_store import content_store_stats, find_preprocessed, reuse_preprocessed
+from src.services.model_registry import model_registry
+from src.services.preprocessing import preprocessing_service
+from src.services.storage import ARCHIVE_DIR, PREPROCESSED_DIR, PROCESSED_DIR, UPLOAD_DIR
+from src.utils.audio_decoder import DEFAULT_SAMPLE_RATE as SAMPLE_RATE, decode_audio
+from src.utils.vad import plan_speech_windows
+from src.utils.waveform_cache import waveform_cache
 from src.models.model import Audio, Segment
 from src.schemas.schema import AudioUploadResponse, DiarizationResult, DiarizationSegment
 
@@ -38,105 +48,142 @@ router = APIRouter(
 )
 security = HTTPBearer()
 
-UPLOAD_DIR = Path("./data/uploads")
-PROCESSED_DIR = Path("./data/processed")
-PREPROCESSED_DIR = Path("./data/preprocessed")
 ALLOWED_EXTENSIONS = {".opus", ".mp3", ".wav"}
 HF_TOKEN = os.getenv("HF_TOKEN")
-SAMPLE_RATE = 16000
+DIARIZATION_MODEL = "pyannote/speaker-diarization-3.1"
 MIN_SEGMENT_LENGTH = 0.5 
 
 
 
-for directory in [UPLOAD_DIR, PROCESSED_DIR, PREPROCESSED_DIR]:
+for directory in [UPLOAD_DIR, PROCESSED_DIR, PREPROCESSED_DIR, ARCHIVE_DIR]:
     directory.mkdir(exist_ok=True, parents=True)
 
 
 
-try:
-    whisper_model_name = "openai/whisper-medium"
-    whisper_processor = WhisperProcessor.from_pretrained(whisper_model_name)
-    whisper_model = WhisperForConditionalGeneration.from_pretrained(whisper_model_name)
+# Models (and torch/transformers themselves) load lazily through the model registry,
+# so importing this module is cheap; main.py warms them up in the background.
+def _load_diarization_pipeline():
+    import torch
+    from pyannote.audio import Pipeline
+    pipeline = Pipeline.from_pretrained(DIARIZATION_MODEL, use_auth_token=HF_TOKEN)
+    if pipeline is None:
+        raise RuntimeError(f"Could not load diarization pipeline {DIARIZATION_MODEL}")
     if torch.cuda.is_available():
-        whisper_model = whisper_model.to("cuda")
-except Exception as e:
-    logger.error(f"Failed to load Whisper model: {str(e)}")
-    raise RuntimeError(f"Failed to load Whisper model: {str(e)}")
+        pipeline.to(torch.device("cuda"))
+    return pipeline
 
-def preprocess_audio(audio_path: str, output_path: str) -> str:
-    """Preprocess audio file to improve quality"""
-    try:
-        y, sr = librosa.load(audio_path, sr=None, mono=False)
-        
-     
-        if len(y.shape) > 1:
-            y = librosa.to_mono(y)
-   
-        if sr != SAMPLE_RATE:
-            y = librosa.resample(y, orig_sr=sr, target_sr=SAMPLE_RATE)
-            
-    
-        y = librosa.util.normalize(y)
-        y = nr.reduce_noise(y=y, sr=SAMPLE_RATE, stationary=True)
-        y, _ = librosa.effects.trim(y, top_db=20)
-        
-    
-        sf.write(output_path, y, SAMPLE_RATE)
-        return output_path
-    except Exception as e:
-        logger.error(f"Audio preprocessing failed for {audio_path}: {str(e)}")
-        print(f"Error in preprocessing: {str(e)}")
-        return audio_path
 
+model_registry.register(DIARIZATION_MODEL, _load_diarization_pipeline)
 
 
-@router.post("/upload", response_model=AudioUploadResponse)
-async def upload_audio(
-    contentUri: str = Body(..., embed=True),
-    contentType: str = Body("audio/mpeg", embed=True),
-    token: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
+def get_diarization_pipeline():
+    """Shared pyannote pipeline, built once per process on first use."""
+    return model_registry.get(DIARIZATION_MODEL)
+
+
+def serving_models() -> List[str]:
+    """Registry names of the models this module needs to serve requests (warm-up and readiness)."""
+    names = [ASR_MODEL_KEY, DIARIZATION_MODEL]
+    if settings.voicemail_precheck_enabled:
+        names.append(settings.voicemail_precheck_model)
+    return names
+
+
+def _load_precheck_model():
+    import torch
+    from transformers import WhisperProcessor, WhisperForConditionalGeneration
+
+    processor = WhisperProcessor.from_pretrained(settings.voicemail_precheck_model)
+    model = WhisperForConditionalGeneration.from_pretrained(settings.voicemail_precheck_model)
+    if torch.cuda.is_available():
+        model = model.to("cuda")
+    return processor, model
+
+
+model_registry.register(settings.voicemail_precheck_model, _load_precheck_model)
+
+
+def transcribe_opening(audio_path: str, seconds: float = None) -> str:
+    """
+    Transcribe only the first seconds of a recording with the small precheck model.
+    Used to spot voicemail/IVR greetings before the full preprocessing and diarization.
+    """
+    seconds = seconds or settings.voicemail_precheck_seconds
     try:
+        y, sr = decode_audio(audio_path, sr=SAMPLE_RATE, duration=seconds), SAMPLE_RATE
+        if len(y) == 0:
+            return ""
+
+        import torch
+
+        processor, model = model_registry.get(settings.voicemail_precheck_model)
+        processed = processor(y, sampling_rate=sr, return_tensors="pt", return_attention_mask=True)
+        if torch.cuda.is_available():
+            processed = {k: v.to("cuda") for k, v in processed.items()}
 
-        match = re.search(r"/recording/(\d+)/content", contentUri)
-        if not match:
-            raise HTTPException(status_code=400, detail="Invalid content URI format")
-        recording_id = match.group(1)
+        # English-only checkpoints (*.en) reject the language/task arguments
+        generate_kwargs = {} if settings.voicemail_precheck_model.endswith(".en") else {"language": "en", "task": "transcribe"}
+        with torch.no_grad():
+            generated_ids = model.generate(
+                input_features=processed["input_features"],
+                attention_mask=processed["attention_mask"],
+                **generate_kwargs
+            )
+        return processor.batch_decode(generated_ids, skip_special_tokens=True)[0].strip()
+    except Exception as e:
+        logger.error(f"Opening transcription failed for {audio_path}: {str(e)}")
+        return ""
 
+@dataclass
+class DownloadedRecording:
+    audio_id: str
+    recording_id: str
+    file_path: Path
+    file_extension: str
+    content_hash: Optional[str] = None
 
-        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-        PREPROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
+async def download_recording(
+    content_uri: str,
+    access_token: str,
+    db: Session,
+    content_type: str = "audio/mpeg"
+) -> DownloadedRecording:
+    """Stream a RingCentral recording into UPLOAD_DIR under a fresh audio_id."""
+    match = re.search(r"/recording/(\d+)/content", content_uri)
+    if not match:
+        raise HTTPException(status_code=400, detail="Invalid content URI format")
+    recording_id = match.group(1)
 
-        headers = {"Authorization": f"Bearer {token.credentials}"}
-        response = requests.get(contentUri, headers=headers)
-   
-        if response is None:
-            raise HTTPException(status_code=400, detail="Downloaded file is empty")
-       
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+    audio_id = str(uuid.uuid4())
+    part_path = UPLOAD_DIR / f"{audio_id}.part"
+
+    try:
+        headers = {"Authorization": f"Bearer {access_token}"}
+        before_request, on_response = ringcentral.download_hooks(content_uri)
+        result = await stream_download(content_uri, headers, part_path, before_request, on_response)
 
-        if response.status_code == 401:
+        if result.status_code == 401:
             try:
-                refreshed_token = refresh_ringcentral_token(db)  # <- Call your function here
+                refreshed_token = await run_in_threadpool(refresh_ringcentral_token, db)
                 headers = {"Authorization": f"Bearer {refreshed_token}"}
-                response = requests.get(contentUri, headers=headers)
+                result = await stream_download(content_uri, headers, part_path, before_request, on_response)
             except Exception as e:
                 logger.error(f"Token refresh failed for recording {recording_id}: {str(e)}")
                 raise HTTPException(status_code=401, detail=f"Token refresh failed: {str(e)}")
 
-  
-        if response.status_code != 200:
-            logger.error(f"Failed to download audio from {contentUri}: Status {response.status_code}, Response: {response.text}")
+        if result.status_code != 200:
+            logger.error(f"Failed to download audio from {content_uri}: Status {result.status_code}, Response: {result.error_text}")
             raise HTTPException(
                 status_code=400,
-                detail=f"Failed to download audio file: {response.text}"
+                detail=f"Failed to download audio file: {result.error_text}"
             )
 
-        if not response.content:
+        if not result.bytes_written:
             raise HTTPException(status_code=400, detail="Downloaded file is empty")
 
-    
         ext_map = {
             "audio/mpeg": ".mp3",
             "audio/wav": ".wav",
@@ -144,8 +191,8 @@ async def upload_audio(
             "audio/mp3": ".mp3",
         }
 
-        contentType = contentType or response.headers.get("Content-Type", "audio/mpeg")
-        file_extension = ext_map.get(contentType.lower(), ".mp3")
+        content_type = content_type or result.content_type or "audio/mpeg"
+        file_extension = ext_map.get(content_type.lower(), ".mp3")
 
         if file_extension not in ALLOWED_EXTENSIONS:
             raise HTTPException(
@@ -153,140 +200,321 @@ async def upload_audio(
                 detail=f"Invalid file format. Allowed formats: {', '.join(ALLOWED_EXTENSIONS)}"
             )
 
-        # Save file
-        audio_id = str(uuid.uuid4())
-        filename = f"{audio_id}{file_extension}"
-        file_path = UPLOAD_DIR / filename
+        file_path = storage.upload_path(audio_id, file_extension)
+        os.replace(part_path, file_path)
+    except Exception:
+        part_path.unlink(missing_ok=True)
+        raise
 
-        with open(file_path, "wb") as f:
-            f.write(response.content)
+    return DownloadedRecording(
+        audio_id=audio_id,
+        recording_id=recording_id,
+        file_path=file_path,
+        file_extension=file_extension,
+        content_hash=result.sha256
+    )
 
-        # Preprocess audio
-        preprocessed_path = PREPROCESSED_DIR / f"{audio_id}_preprocessed.wav"
-        processed_path = preprocess_audio(str(file_path), str(preprocessed_path))
+
+async def preprocess_recording(downloaded: DownloadedRecording, db: Session) -> AudioUploadResponse:
+    """
+    Preprocess a downloaded recording in the process pool and save its Audio row.
+    Bytes that were already preprocessed (same SHA-256) reuse the existing WAV instead.
+    """
+    try:
+        existing = find_preprocessed(db, downloaded.content_hash)
+        if existing is not None:
+            db_audio = reuse_preprocessed(
+                db, existing, downloaded.audio_id, downloaded.recording_id, downloaded.file_path
+            )
+            db.commit()
+            return AudioUploadResponse(
+                audio_id=db_audio.id,
+                file_path=db_audio.processed_path,
+                original_filename=db_audio.original_filename,
+                file_type=db_audio.file_type
+            )
+
+        preprocessed_path = storage.preprocessed_path(downloaded.content_hash or downloaded.audio_id)
+        processed_path = await preprocessing_service.preprocess(
+            str(downloaded.file_path), str(preprocessed_path), audio_id=downloaded.audio_id
+        )
 
         # Save metadata to DB
         db_audio = Audio(
-            id=audio_id,
-            original_filename=filename,
-            original_path=str(file_path),
+            id=downloaded.audio_id,
+            original_filename=downloaded.file_path.name,
+            original_path=str(downloaded.file_path),
             processed_path=processed_path,
-            file_type=file_extension,
+            file_type=downloaded.file_extension,
             processed=False,  # Change to True if preprocessing is final
             uploaded_at=datetime.utcnow(),
-            recording_id=recording_id
+            recording_id=downloaded.recording_id,
+            content_hash=downloaded.content_hash
         )
 
         db.add(db_audio)
         db.commit()
         db.refresh(db_audio)
+    except Exception:
+        db.rollback()
+        raise
 
-        return AudioUploadResponse(
-            audio_id=audio_id,
-            file_path=processed_path,
-            original_filename=filename,
-            file_type=file_extension
-        )
+    return AudioUploadResponse(
+        audio_id=downloaded.audio_id,
+        file_path=processed_path,
+        original_filename=downloaded.file_path.name,
+        file_type=downloaded.file_extension
+    )
 
+
+@router.post("/upload", response_model=AudioUploadResponse)
+async def upload_audio(
+    contentUri: str = Body(..., embed=True),
+    contentType: str = Body("audio/mpeg", embed=True),
+    token: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    try:
+        downloaded = await download_recording(contentUri, token.credentials, db, contentType)
+        return await preprocess_recording(downloaded, db)
     except Exception as e:
-        logger.error(f"Audio upload failed for recording {recording_id if 'recording_id' in locals() else 'unknown'}: {str(e)}")
+        logger.error(f"Audio upload failed for {contentUri}: {str(e)}")
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
 def transcribe_audio(audio_data: np.ndarray, sr: int = SAMPLE_RATE) -> str:
     try:
-        processed = whisper_processor(
-            audio_data,
-            sampling_rate=sr,
-            return_tensors="pt",
-            return_attention_mask=True
-        )
-        if torch.cuda.is_available():
-            processed = {k: v.to("cuda") for k, v in processed.items()}
-        with torch.no_grad():
-            generated_ids = whisper_model.generate(
-                input_features=processed["input_features"],
-                attention_mask=processed["attention_mask"],
-                language="en",
-                task="transcribe"
-            )
-        return whisper_processor.batch_decode(generated_ids, skip_special_tokens=True)[0].strip()
+        return get_asr_backend().transcribe([audio_data], sr)[0]
     except Exception as e:
         logger.error(f"Transcription failed: {str(e)}")
         print(f"Transcription error: {str(e)}")
         return ""
 
-def transcribe_long_audio(audio_data: np.ndarray, sr: int = SAMPLE_RATE, chunk_duration: int = 30) -> str:
-    """Split long audio into chunks and transcribe each, then join."""
+def pack_batches(durations: List[float], batch_size: int, max_batch_seconds: float) -> List[List[int]]:
+    """
+    Group item indices into batches of at most batch_size items and max_batch_seconds
+    of audio. Items are packed longest first so each batch holds similar lengths.
+    """
+    order = sorted(range(len(durations)), key=lambda i: durations[i], reverse=True)
+    batches = []
+    current = []
+    current_seconds = 0.0
+    for index in order:
+        if current and (len(current) >= batch_size or current_seconds + durations[index] > max_batch_seconds):
+            batches.append(current)
+            current = []
+            current_seconds = 0.0
+        current.append(index)
+        current_seconds += durations[index]
+    if current:
+        batches.append(current)
+    return batches
+
+def transcribe_audio_batch(
+    audio_segments: List[np.ndarray],
+    sr: int = SAMPLE_RATE,
+    batch_size: int = None,
+    max_batch_seconds: float = None
+) -> List[str]:
+    """
+    Transcribe many audio segments with batched Whisper generate calls.
+    Returns one text per segment, in the same order as the input.
+    """
+    batch_size = batch_size or settings.whisper_batch_size
+    max_batch_seconds = max_batch_seconds or settings.whisper_max_batch_seconds
+
+    texts = [""] * len(audio_segments)
+    indices = [i for i, segment in enumerate(audio_segments) if len(segment) > 0]
+    durations = [len(audio_segments[i]) / sr for i in indices]
+
+    for batch in pack_batches(durations, batch_size, max_batch_seconds):
+        batch_indices = [indices[i] for i in batch]
+        try:
+            decoded = get_asr_backend().transcribe([audio_segments[i] for i in batch_indices], sr)
+            for i, text in zip(batch_indices, decoded):
+                texts[i] = text
+        except Exception as e:
+            logger.error(f"Batched transcription failed for {len(batch_indices)} segments, retrying one by one: {str(e)}")
+            for i in batch_indices:
+                texts[i] = transcribe_audio(audio_segments[i], sr)
+
+    return texts
+
+def plan_transcription_windows(audio_data: np.ndarray, sr: int = SAMPLE_RATE, chunk_duration: int = 30) -> List[Tuple[int, int]]:
+    """
+    (start, end) sample ranges to send to Whisper: speech-only windows cut at pauses
+    when VAD is enabled, otherwise fixed chunk_duration slices.
+    """
     chunk_size = chunk_duration * sr
-    full_text = []
-    start = 0
-    total_len = len(audio_data)
+    fixed = [(start, min(start + chunk_size, len(audio_data))) for start in range(0, len(audio_data), chunk_size)]
+    if not settings.vad_enabled:
+        return fixed
 
-    while start < total_len:
-        end = min(start + chunk_size, total_len)
-        chunk = audio_data[start:end]
-        text = transcribe_audio(chunk, sr)
-        if text:
-            full_text.append(text)
-        start = end
+    plan = plan_speech_windows(audio_data, sr, max_window_seconds=chunk_duration)
+    logger.info(
+        f"VAD: {plan.speech_ratio:.0%} speech ({plan.speech_seconds:.1f}s of {plan.total_seconds:.1f}s), "
+        f"{len(plan.windows)} windows instead of {len(fixed)} fixed chunks"
+    )
+    return plan.windows
 
+def transcribe_long_audio(audio_data: np.ndarray, sr: int = SAMPLE_RATE, chunk_duration: int = 30) -> str:
+    """Split long audio into speech windows and transcribe them in batches, then join."""
+    windows = plan_transcription_windows(audio_data, sr, chunk_duration)
+    chunks = [audio_data[start:end] for start, end in windows]
+    full_text = [text for text in transcribe_audio_batch(chunks, sr) if text]
     return " ".join(full_text).strip()
 
-@router.get("/diarize/{audio_id}", response_model=DiarizationResult)
-async def diarize_audio(audio_id: str, db: Session = Depends(get_db)):
+def transcribe_with_word_timestamps(audio_data: np.ndarray, sr: int = SAMPLE_RATE, chunk_duration: int = 30) -> Tuple[str, List[Dict]]:
+    """Transcribe long audio once, returning the full text and word-level timestamps."""
+    windows = plan_transcription_windows(audio_data, sr, chunk_duration)
+    offsets = [start for start, _ in windows]
+    chunks = [audio_data[start:end] for start, end in windows]
+    if not chunks:
+        return "", []
+    backend = get_asr_backend()
+
+    try:
+        results = backend.transcribe_words(chunks, sr, batch_size=settings.whisper_batch_size)
+    except Exception as e:
+        logger.error(f"Batched word-level transcription failed, retrying chunk by chunk: {str(e)}")
+        results = []
+        for start, chunk in zip(offsets, chunks):
+            try:
+                results.extend(backend.transcribe_words([chunk], sr))
+            except Exception as chunk_error:
+                logger.error(f"Word-level transcription failed for chunk at {start / sr:.1f}s: {str(chunk_error)}")
+                results.append(("", []))
+
+    full_text = []
+    words = []
+    for start, (text, chunk_words) in zip(offsets, results):
+        offset = start / sr
+        if text:
+            full_text.append(text)
+        for word in chunk_words:
+            words.append({
+                "text": word["text"],
+                "start": offset + word["start"],
+                "end": offset + word["end"]
+            })
+
+    return " ".join(full_text).strip(), words
+
+def assign_words_to_turns(words: List[Dict], turns: List[Tuple[float, float]]) -> List[str]:
+    """
+    Assign each word to the diarization turn it overlaps most, falling back to the
+    nearest turn, and return the joined text for every turn.
+    Both lists must be sorted by start time.
+    """
+    turn_words = [[] for _ in turns]
+    if not turns:
+        return []
+
+    # Running max of turn ends lets us skip turns that finished before the current word
+    max_end = []
+    running = float("-inf")
+    for _, turn_end in turns:
+        running = max(running, turn_end)
+        max_end.append(running)
+
+    lo = 0
+    for word in words:
+        while lo < len(turns) - 1 and max_end[lo] < word["start"]:
+            lo += 1
+
+        best_index = None
+        best_overlap = 0.0
+        best_distance = float("inf")
+        j = max(lo - 1, 0)
+        while j < len(turns) and turns[j][0] < word["end"]:
+            turn_start, turn_end = turns[j]
+            overlap = min(turn_end, word["end"]) - max(turn_start, word["start"])
+            if overlap > best_overlap:
+                best_index, best_overlap = j, overlap
+            elif best_overlap == 0.0 and word["start"] - turn_end < best_distance:
+                best_index, best_distance = j, word["start"] - turn_end
+            j += 1
+
+        # Word falls in a gap: the next turn may be closer than the previous one
+        if best_overlap == 0.0 and j < len(turns) and turns[j][0] - word["end"] < best_distance:
+            best_index = j
+
+        if best_index is not None:
+            turn_words[best_index].append(word["text"])
+
+    return [" ".join(texts).strip() for texts in turn_words]
+
+def run_diarization(audio_id: str, db: Session) -> DiarizationResult:
+    """Transcribe and diarize a stored recording, replacing its Segment rows."""
     try:
         db_audio = db.query(Audio).filter(Audio.id == audio_id).first()
         if not db_audio:
             raise HTTPException(status_code=404, detail="Audio ID not found")
 
         audio_path = db_audio.processed_path
-        if not os.path.exists(audio_path):
-            logger.error(f"Audio file not found for audio_id {audio_id}: {audio_path}")
-            raise HTTPException(status_code=404, detail="Audio file not found")
-
-        # Full transcription with chunking to avoid truncation
-        y, sr = librosa.load(audio_path, sr=SAMPLE_RATE)
-        full_transcript = transcribe_long_audio(y, sr)
+        sr = SAMPLE_RATE
+        # Reuse the waveform preprocessing left behind; decode the WAV only on a miss
+        y = waveform_cache.get(audio_id)
+        if y is None:
+            if not audio_path or not os.path.exists(audio_path):
+                logger.error(f"Audio file not found for audio_id {audio_id}: {audio_path}")
+                raise HTTPException(status_code=404, detail="Audio file not found")
+            y = decode_audio(audio_path, sr=SAMPLE_RATE)
+        single_pass = settings.diarize_transcription_mode == "single_pass"
+
+        if single_pass:
+            # One Whisper pass feeds both the full transcript and the segment text
+            full_transcript, words = transcribe_with_word_timestamps(y, sr)
+        else:
+            # Full transcription with chunking to avoid truncation
+            full_transcript = transcribe_long_audio(y, sr)
 
         # Diarization pipeline
-        from pyannote.audio import Pipeline
-        pipeline = Pipeline.from_pretrained(
-            "pyannote/speaker-diarization-3.1",
-            use_auth_token=HF_TOKEN
-        )
-        diarization = pipeline(audio_path, num_speakers=2, min_speakers=1, max_speakers=2)
+        pipeline = get_diarization_pipeline()
+        diarization_start = time.perf_counter()
+        # pyannote takes the in-memory waveform as a (channel, time) tensor; cached buffers are read-only, so copy
+        import torch
 
-        segments = []
-        speaker_mapping = {}
-        db.query(Segment).filter(Segment.audio_id == audio_id).delete()
+        waveform = {"waveform": torch.from_numpy(np.array(y)).unsqueeze(0), "sample_rate": sr}
+        diarization = pipeline(waveform, num_speakers=2, min_speakers=1, max_speakers=2)
+        logger.info(f"Diarization inference for audio_id {audio_id} took {time.perf_counter() - diarization_start:.2f}s")
 
+        turns = []
+        speaker_mapping = {}
         for turn, _, speaker in diarization.itertracks(yield_label=True):
             if turn.end - turn.start < MIN_SEGMENT_LENGTH:
                 continue
             if speaker not in speaker_mapping:
                 speaker_mapping[speaker] = f"Speaker_{len(speaker_mapping) + 1}"
+            turns.append((turn.start, turn.end, speaker_mapping[speaker]))
+
+        if single_pass:
+            texts = assign_words_to_turns(words, [(start, end) for start, end, _ in turns])
+        else:
+            # Transcribe the segments in padded batches
+            texts = transcribe_audio_batch(
+                [y[int(start * sr):int(end * sr)] for start, end, _ in turns],
+                sr
+            )
 
-            # Transcribe segment
-            start_sample = int(turn.start * sr)
-            end_sample = int(turn.end * sr)
-            segment_audio = y[start_sample:end_sample]
-            text = transcribe_audio(segment_audio, sr)
+        segments = []
+        db.query(Segment).filter(Segment.audio_id == audio_id).delete()
 
+        for (start, end, speaker), text in zip(turns, texts):
             db_segment = Segment(
                 audio_id=audio_id,
-                speaker=speaker_mapping[speaker],
-                start=turn.start,
-                end=turn.end,
+                speaker=speaker,
+                start=start,
+                end=end,
                 text=text
             )
             db.add(db_segment)
 
             segments.append({
-                "speaker": speaker_mapping[speaker],
-                "start": turn.start,
-                "end": turn.end,
+                "speaker": speaker,
+                "start": start,
+                "end": end,
                 "text": text
             })
 
@@ -306,6 +534,26 @@ async def diarize_audio(audio_id: str, db: Session = Depends(get_db)):
         logger.error(f"Diarization failed for audio_id {audio_id}: {str(e)}")
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Diarization failed: {str(e)}")
+    finally:
+        # The waveform is only kept for this handoff; free it once diarization is done with it
+        waveform_cache.discard(audio_id)
+
+@router.get("/content-cache/stats")
+def get_content_cache_stats():
+    return content_store_stats()
+
+@router.get("/preprocessing/stats")
+def get_preprocessing_stats():
+    return {**preprocessing_service.stats(), "waveform_cache": waveform_cache.stats()}
+
+@router.get("/diarize/{audio_id}", response_model=DiarizationResult)
+async def diarize_audio(audio_id: str, db: Session = Depends(get_db)):
+    if settings.inference_mode == "queue":
+        if not db.query(Audio.id).filter(Audio.id == audio_id).first():
+            raise HTTPException(status_code=404, detail="Audio ID not found")
+        job = enqueue_job(db, "diarize", audio_id)
+        return JSONResponse(status_code=202, content=job_summary(job))
+    return await run_in_threadpool(run_diarization, audio_id, db)
 
 def get_audio_segments(audio_id: str, db: Session) -> List[DiarizationSegment]:
     segments = db.query(Segment).filter(Segment.audio_id == audio_id).all()
@@ -8,6 +8,7 @@ import requests
 from src.schemas.schema import OAuthRequestSchema , TokenRequestSchema
 from fastapi import APIRouter
 from src.config.log_config import logger
+from src.services import ringcentral
 
 
 router = APIRouter(
@@ -59,7 +60,7 @@ def get_ringcentral_token(
     }
     try:
 
-        response = requests.post(RINGCENTRAL_TOKEN_URL, headers=headers, data=data)
+        response = ringcentral.request("POST", RINGCENTRAL_TOKEN_URL, headers=headers, data=data)
 
         if response.status_code != 200:
             logger.error(f"RingCentral token request failed - Status: {response.status_code}, Response: {response.text}")
@@ -2,16 +2,22 @@ import json
 import re
 from zoneinfo import ZoneInfo
 import ollama
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
+from src.config.pydantic_config import settings
 from src.utils.google_sheets_helper import append_dict_to_sheet
 from src.database.database import get_db
 from src.models.model import Audio, Analysis, Segment
-from src.schemas.schema import CallAnalysisResult, DiarizationSegment
-from src.routes.audio import diarize_audio
+from src.schemas.schema import CallAnalysisResult, CallAnalysisRubric, DiarizationSegment
+from src.routes.audio import run_diarization
 from src.models.model import RecordingDetail
 from src.config.log_config import logger
+from src.services.job_queue import enqueue_job, job_summary
+from src.services.analysis_cache import cache_stats, get_cached_analysis, make_cache_key, store_analysis
  
 
 router = APIRouter(
@@ -22,14 +28,45 @@ router = APIRouter(
  
 
 MISTRAL_MODEL = "mistral"  
+# Bump whenever the prompt text or rubric changes so cached analyses are not reused
+PROMPT_TEMPLATE_VERSION = "2"
+OLLAMA_OPTIONS = {
+    "temperature": 0.1,
+    "num_predict": 4000
+}
 
 
 @router.post("/", response_model=CallAnalysisResult)
-async def analyze_call(audio_id: str = Header(..., description="Audio ID to analyze"), db: Session = Depends(get_db)):
+async def analyze_call(
+    audio_id: str = Header(..., description="Audio ID to analyze"),
+    cache_control: Optional[str] = Header(None, description="Send 'no-cache' to bypass the analysis cache"),
+    db: Session = Depends(get_db)
+):
     """
     Analyze a transcribed call using Ollama's Mistral model.
     Pass the audio_id in the request header. The segments will be retrieved from the database.
     """
+    use_cache = not (cache_control and "no-cache" in cache_control.lower())
+    if settings.inference_mode == "queue":
+        audio = db.query(Audio).filter(Audio.id == audio_id).first()
+        if not audio:
+            raise HTTPException(status_code=404, detail="Audio ID not found")
+        job = enqueue_job(db, "analyze", audio_id, recording_id=audio.recording_id, payload={"use_cache": use_cache})
+        return JSONResponse(status_code=202, content=job_summary(job))
+    return await run_in_threadpool(run_call_analysis, audio_id, db, use_cache)
+
+
+@router.get("/cache/stats")
+def get_analysis_cache_stats():
+    return cache_stats()
+
+
+def run_call_analysis(audio_id: str, db: Session, use_cache: bool = True) -> CallAnalysisResult:
+    """
+    Analyze a stored call with Mistral, save the Analysis row and append the report row.
+    Diarizes the audio first if that has not happened yet.
+    Unchanged conversations are answered from the analysis cache unless use_cache is False.
+    """
     db_audio = db.query(Audio).filter(Audio.id == audio_id).first()
     if not db_audio:
         raise HTTPException(status_code=404, detail="Audio ID not found")
@@ -71,7 +108,7 @@ async def analyze_call(audio_id: str = Header(..., description="Audio ID to anal
 
     if not db_audio.processed:
         try:
-            diarization_result = await diarize_audio(audio_id, db)
+            diarization_result = run_diarization(audio_id, db)
             if diarization_result.status.startswith("failed"):
                 raise HTTPException(
                     status_code=400,
@@ -99,18 +136,34 @@ async def analyze_call(audio_id: str = Header(..., description="Audio ID to anal
  
 
     conversation_text = format_conversation(segments)
-    prompt = create_mistral_prompt(conversation_text)
  
-    try:
-        analysis_result = query_ollama_mistral(prompt, MISTRAL_MODEL)
-    except Exception as e:
-        return CallAnalysisResult(
-            audio_id=audio_id,
-            analysis={"error": str(e)},
-            status="failed"
-        )
- 
-    parsed_analysis = parse_mistral_response(analysis_result)
+    cache_key = make_cache_key(
+        conversation_text,
+        PROMPT_TEMPLATE_VERSION,
+        MISTRAL_MODEL,
+        {**OLLAMA_OPTIONS, "output_mode": settings.analysis_output_mode}
+    )
+    cached = get_cached_analysis(db, cache_key) if use_cache and settings.analysis_cache_enabled else None
+
+    if cached:
+        logger.info(f"Analysis cache hit for audio_id {audio_id}")
+        analysis_result, parsed_analysis = cached
+    else:
+        try:
+            if settings.analysis_output_mode == "structured":
+                analysis_result, parsed_analysis = query_structured_analysis(conversation_text, MISTRAL_MODEL)
+            else:
+                analysis_result = query_ollama_mistral(create_mistral_prompt(conversation_text), MISTRAL_MODEL)
+                parsed_analysis = parse_mistral_response(analysis_result)
+        except Exception as e:
+            return CallAnalysisResult(
+                audio_id=audio_id,
+                analysis={"error": str(e)},
+                status="failed"
+            )
+
+        if settings.analysis_cache_enabled:
+            store_analysis(db, cache_key, MISTRAL_MODEL, PROMPT_TEMPLATE_VERSION, analysis_result, parsed_analysis)
 
  
     db_analysis = db.query(Analysis).filter(Analysis.audio_id == audio_id).first()
@@ -196,6 +249,36 @@ async def analyze_call(audio_id: str = Header(..., description="Audio ID to anal
         status="completed"
     )
  
+FREEFORM_OUTPUT_INSTRUCTIONS = """
+    Provide your analysis in JSON format with scores and explanations for each dimension.
+    Include a short summary of the overall conversation quality and key observations.
+   
+    Format each category to include both a numeric score AND an explanation field.
+    For the Call Outcome Classification, include "outcome_category" and "supporting_phrases" fields.
+   
+    Example for one category:
+    {
+      "professionalism_score": 7,
+      "professionalism_explanation": "Both speakers maintained professional language but occasionally used casual expressions.",
+      ...
+      "call_outcome": {
+        "outcome_category": "Not interested",
+        "supporting_phrases": ["I'm not interested right now", "This doesn't work for me"],
+        "explanation": "The prospect clearly expressed disinterest multiple times during the call closing."
+      }
+    }
+"""
+
+STRUCTURED_OUTPUT_INSTRUCTIONS = """
+    Respond with a single JSON object and nothing else. Use these fields:
+    introduction_score, introduction_explanation, adherence_to_script_score,
+    adherence_to_script_explanation, actively_listening_score, actively_listening_explanation,
+    fumble_score, fumble_explanation, probing_score, probing_explanation, closing_score,
+    closing_explanation, overall_score, overall_explanation, summary and
+    call_outcome (with outcome_category, supporting_phrases and explanation).
+    Scores are integers from 1 to 100.
+"""
+ 
 def format_conversation(segments: List[DiarizationSegment]) -> str:
     """
     Format the diarization segments into a clean conversation transcript.
@@ -210,10 +293,11 @@ def format_conversation(segments: List[DiarizationSegment]) -> str:
     return formatted_text
  
 
-def create_mistral_prompt(conversation_text: str) -> str:
+def create_mistral_prompt(conversation_text: str, output_instructions: str = None) -> str:
     """
     Create a detailed prompt for the Mistral model to analyze the conversation
     """
+    output_instructions = (output_instructions or FREEFORM_OUTPUT_INSTRUCTIONS).strip()
     prompt = f"""
     You are an expert conversation analyst. Analyze the following call transcript
     between two speakers and provide detailed insights.
@@ -327,33 +411,19 @@ def create_mistral_prompt(conversation_text: str) -> str:
        - If disinterest was expressed, note the exact phrases used
        - IMPORTANT: Provide specific phrases that indicated the outcome and ensure the classification matches the actual conversation ending
    
-    Provide your analysis in JSON format with scores and explanations for each dimension.
-    Include a short summary of the overall conversation quality and key observations.
-   
-    Format each category to include both a numeric score AND an explanation field.
-    For the Call Outcome Classification, include "outcome_category" and "supporting_phrases" fields.
-   
-    Example for one category:
-    {{
-      "professionalism_score": 7,
-      "professionalism_explanation": "Both speakers maintained professional language but occasionally used casual expressions.",
-      ...
-      "call_outcome": {{
-        "outcome_category": "Not interested",
-        "supporting_phrases": ["I'm not interested right now", "This doesn't work for me"],
-        "explanation": "The prospect clearly expressed disinterest multiple times during the call closing."
-      }}
-    }}
+    {output_instructions}
     """
     return prompt
  
-def query_ollama_mistral(prompt: str, model: str) -> str:
+def query_ollama_mistral(prompt: str, model: str, format: Dict[str, Any] = None) -> str:
     """
-    Send a prompt to Ollama using the Python library
+    Send a prompt to Ollama using the Python library.
+    Pass a JSON schema as format to constrain the reply to that schema.
     """
     try:
       
         response = ollama.chat(
+            format=format,
             model=model,
             messages=[
                 {
@@ -365,10 +435,7 @@ def query_ollama_mistral(prompt: str, model: str) -> str:
                     "content": prompt
                 }
             ],
-            options={
-                "temperature": 0.1,
-                "num_predict": 4000
-            }
+            options=OLLAMA_OPTIONS
         )
        
     
@@ -380,6 +447,46 @@ def query_ollama_mistral(prompt: str, model: str) -> str:
     except Exception as e:
         raise Exception(f"Error communicating with Ollama library: {str(e)}")
 
+def create_repair_prompt(response_text: str, error: ValidationError) -> str:
+    """
+    Short follow-up prompt asking the model to fix a reply that failed validation
+    """
+    problems = "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'response'}: {err['msg']}"
+        for err in error.errors()[:10]
+    )
+    return f"""
+    Your previous reply was not valid for the required JSON schema.
+    Problems: {problems}
+
+    Previous reply:
+    {response_text[:6000]}
+
+    Return only the corrected JSON object. Keep the same scores and explanations where they were valid.
+    """
+
+def query_structured_analysis(conversation_text: str, model: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Ask Ollama for schema-constrained JSON and validate it in a single pass.
+    Invalid replies are retried with a short repair prompt instead of regex scraping.
+    Returns the raw reply and the validated analysis.
+    """
+    schema = CallAnalysisRubric.model_json_schema()
+    prompt = create_mistral_prompt(conversation_text, STRUCTURED_OUTPUT_INSTRUCTIONS)
+    response_text = query_ollama_mistral(prompt, model, format=schema)
+
+    attempt = 0
+    while True:
+        try:
+            rubric = CallAnalysisRubric.model_validate_json(response_text)
+            return response_text, rubric.model_dump()
+        except ValidationError as e:
+            if attempt >= settings.analysis_max_repair_attempts:
+                raise Exception(f"Analysis did not match the rubric schema after {attempt} repair attempts: {e}")
+            attempt += 1
+            logger.warning(f"Structured analysis failed validation, repair attempt {attempt}: {e.error_count()} errors")
+            response_text = query_ollama_mistral(create_repair_prompt(response_text, e), model, format=schema)
+
 def apply_score_threshold(score: Any) -> int:
     """
     Applies threshold logic specifically for scoring:
@@ -536,7 +643,7 @@ def extract_explanation(text: str, category: str) -> str:
        
     return f"No explanation provided for {category} score."
  
-def extract_score(text: str, category: str, default: int) -> int:
+def extract_score(text: str, category: str, default: int = 0) -> int:
     """
     Extract numerical score for a category from text
     """
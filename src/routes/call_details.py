@@ -1,7 +1,6 @@
 from fastapi import  Depends, HTTPException
 from fastapi.security import  HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-import requests
 from src.schemas.schema import  CallLogQueryParams
 from fastapi import APIRouter
 from src.schemas.schema import RecordingDetail
@@ -11,6 +10,9 @@ from src.models.model import RecordingDetail
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from src.config.log_config import logger
+from src.services import ringcentral
+from src.services.call_log_sync import find_call_log_record, store_call_log_records
+from fastapi.concurrency import run_in_threadpool
 security = HTTPBearer()
 
 router = APIRouter(
@@ -37,11 +39,7 @@ def get_call_log(
         "showDeleted": str(params.showDeleted).lower()
     }
 
-    headers = {
-        "Authorization": f"Bearer {token.credentials}"
-    }
-
-    response = requests.get(base_url, headers=headers, params=query_params)
+    response = ringcentral.request("GET", base_url, access_token=token.credentials, params=query_params)
 
     if response.status_code != 200:
         logger.error(f"Call log API error {response.status_code}: {response.text}")
@@ -60,30 +58,28 @@ def get_call_log(
     response_json["records"] = filtered_records
     return response_json
  
-@router.get("/ringcentral/recording/{recording_id}")
-async def get_recording(
-    recording_id: str,
-    token: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    headers = {
-        "Authorization": f"Bearer {token.credentials}"
-    }
-    recording_url = f"https://platform.ringcentral.com/restapi/v1.0/account/~/recording/{recording_id}"
-    recording_response = requests.get(recording_url, headers=headers)
-
-    if recording_response.status_code != 200:
-        logger.error(f"Recording fetch error {recording_response.status_code}: {recording_response.text}")
-        raise HTTPException(status_code=recording_response.status_code, detail=recording_response.json())
-
-    recording_data = recording_response.json()
-    recording_data["name"] = ""
-    recording_data["phoneNumber"] = ""
-    recording_data["startTime"] = ""
-
+@router.get("/ringcentral/rate-limits")
+def get_rate_limit_stats():
+    """Requests, time spent waiting on RingCentral rate limits and the current per-group budget"""
+    return ringcentral.rate_limit_stats()
+
+def _recording_metadata(recording_data, log):
+    """Copy the caller/callee, EST start time and duration of a call-log record onto recording_data"""
+    recording_data["phoneNumber"] = log.get("to", {}).get("phoneNumber", "")
+    recording_data["name"] = log.get("from", {}).get("name", "")
+    utc_time = datetime.fromisoformat(log.get("startTime").replace("Z", "+00:00"))
+    est_time = utc_time.astimezone(ZoneInfo("America/New_York"))
+    recording_data["startTime"] = est_time.isoformat()
+    recording_data["duration"]= log.get("duration", 0)
+    return recording_data
+
+
+def _scan_call_log(recording_id: str, access_token: str, db: Session):
+    """
+    Cold-miss fallback: page through the last 30 days of the call log for the recording.
+    Every page read is stored in the local index, so later lookups are served from Postgres.
+    """
     call_log_url = "https://platform.ringcentral.com/restapi/v1.0/account/~/call-log"
-    
-
     date_from = (datetime.utcnow() - timedelta(days=30)).isoformat() + "Z"
     params = {
         "withRecording": "true",
@@ -92,10 +88,8 @@ async def get_recording(
         "view": "Detailed"
     }
 
-    found = False
-
-    while not found and call_log_url:
-        call_log_response = requests.get(call_log_url, headers=headers, params=params)
+    while call_log_url:
+        call_log_response = ringcentral.request("GET", call_log_url, access_token=access_token, params=params)
         
         if call_log_response.status_code != 200:
             logger.error(f"Call log (recording match) error {call_log_response.status_code}: {call_log_response.text}")
@@ -103,38 +97,66 @@ async def get_recording(
 
         response_json = call_log_response.json()
         call_logs = response_json.get("records", [])
+        store_call_log_records(db, call_logs)
 
         for log in call_logs:
             recording_info = log.get("recording")
             if recording_info and recording_info.get("id") == recording_id:
-                recording_data["phoneNumber"] = log.get("to", {}).get("phoneNumber", "")
-                recording_data["name"] = log.get("from", {}).get("name", "")
-                utc_time = datetime.fromisoformat(log.get("startTime").replace("Z", "+00:00"))
-                est_time = utc_time.astimezone(ZoneInfo("America/New_York"))
-                recording_data["startTime"] = est_time.isoformat()
-                recording_data["duration"]= log.get("duration", 0)
-                found = True
-                break
+                return log
 
         next_page_uri = response_json.get("navigation", {}).get("nextPage", {}).get("uri")
         if next_page_uri:
-            call_log_url = f"https://platform.ringcentral.com{next_page_uri}"
+            call_log_url = ringcentral.absolute_url(next_page_uri)
             params = None  
         else:
             break
 
+    return None
+
+
+@router.get("/ringcentral/recording/{recording_id}")
+async def get_recording(
+    recording_id: str,
+    token: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    # Always asked with the caller's token: RingCentral decides whether it may see this recording
+    recording_url = f"https://platform.ringcentral.com/restapi/v1.0/account/~/recording/{recording_id}"
+    recording_response = await run_in_threadpool(ringcentral.request, "GET", recording_url, access_token=token.credentials)
+
+    if recording_response.status_code != 200:
+        logger.error(f"Recording fetch error {recording_response.status_code}: {recording_response.text}")
+        raise HTTPException(status_code=recording_response.status_code, detail=recording_response.json())
+
+    recording_data = recording_response.json()
+    # The local index only replaces the call-log scan for the caller/callee metadata
+    log = find_call_log_record(db, recording_id)
+    if log is None:
+        logger.info(f"Recording {recording_id} not in the local call log index, scanning the call log API")
+        try:
+            log = await run_in_threadpool(_scan_call_log, recording_id, token.credentials, db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    recording_data["name"] = ""
+    recording_data["phoneNumber"] = ""
+    recording_data["startTime"] = ""
+    if log is not None:
+        _recording_metadata(recording_data, log)
+
     existing = db.query(RecordingDetail).filter_by(recording_id=recording_id).first()
     if not existing:
         new_record = RecordingDetail(
             recording_id=recording_id,
             phone_number=recording_data.get("phoneNumber") or None,
             username=recording_data.get("name") or None,
-            start_time=recording_data.get("startTime"),
+            start_time=recording_data.get("startTime") or None,
             duration=recording_data.get("duration") or None
         )
         db.add(new_record)
         db.commit()
         db.refresh(new_record)
 
-        return recording_data
-
+    return recording_data
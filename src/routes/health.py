@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from src.config.pydantic_config import settings
+from src.routes.audio import serving_models
+from src.services.model_registry import model_registry
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"],
+)
+
+
+@router.get("/live")
+def liveness():
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def readiness():
+    """200 once every serving model is loaded, 503 while they are still loading (or failed)."""
+    # In queue mode inference runs in worker.py processes, so the API needs no models
+    names = serving_models() if settings.inference_mode == "inline" else []
+    models = model_registry.status(names)
+    ready = all(status == "ready" for status in models.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not ready",
+            "models": models,
+            "load_times": {name: round(seconds, 2) for name, seconds in model_registry.load_times().items()},
+        },
+    )
@@ -0,0 +1,63 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from src.database.database import get_db
+from src.models.model import Audio, InferenceJob
+from src.schemas.schema import JobCreateRequest
+from src.services.job_queue import enqueue_job, job_summary, queue_stats
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+)
+
+
+@router.post("/", status_code=202)
+def create_job(request: JobCreateRequest, db: Session = Depends(get_db)):
+    """Queue a diarize/analyze job for worker.py; an identical active job is returned instead of duplicated."""
+    audio = db.query(Audio).filter(Audio.id == request.audio_id).first()
+    if not audio:
+        raise HTTPException(status_code=404, detail="Audio ID not found")
+    job = enqueue_job(
+        db,
+        request.kind,
+        request.audio_id,
+        recording_id=audio.recording_id,
+        payload={"use_cache": request.use_cache},
+    )
+    return JSONResponse(status_code=202, content=job_summary(job))
+
+
+@router.get("/stats")
+def get_queue_stats(db: Session = Depends(get_db)):
+    return queue_stats(db)
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    job = db.query(InferenceJob).filter(InferenceJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_summary(job)
+
+
+@router.get("/")
+def list_jobs(
+    status: Optional[str] = None,
+    audio_id: Optional[str] = None,
+    recording_id: Optional[str] = None,
+    limit: int = Query(50, le=500),
+    db: Session = Depends(get_db),
+):
+    query = db.query(InferenceJob)
+    if status:
+        query = query.filter(InferenceJob.status == status)
+    if audio_id:
+        query = query.filter(InferenceJob.audio_id == audio_id)
+    if recording_id:
+        query = query.filter(InferenceJob.recording_id == recording_id)
+    jobs = query.order_by(InferenceJob.created_at.desc()).limit(limit).all()
+    return [job_summary(job) for job in jobs]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 import datetime
 from pydantic import BaseModel, HttpUrl, Field
 from datetime import datetime 
@@ -24,8 +24,8 @@ class AudioCreate(AudioBase):
 
 class AudioInDB(AudioBase):
     id: str
-    original_path: str
-    processed_path: str
+    original_path: Optional[str] = None  # None once the storage janitor has deleted the file
+    processed_path: Optional[str] = None
     uploaded_at: datetime
     recording_id: str
     
@@ -54,6 +54,37 @@ class CallAnalysisParameters(BaseModel):
     script_adherence: Optional[Dict[str, Any]] = None
     summary: str
 
+class CallOutcome(BaseModel):
+    outcome_category: Literal[
+        "Prospect agreed for the meeting",
+        "Prospect disconnected the call",
+        "Prospect not interested",
+        "Out of scope",
+        "Prospect will reach out in future if required",
+        "Call back requested",
+    ]
+    supporting_phrases: List[str]
+    explanation: str
+
+class CallAnalysisRubric(BaseModel):
+    """Rubric the LLM must fill in; its JSON schema constrains Ollama's output."""
+    introduction_score: int = Field(..., ge=0, le=100)
+    introduction_explanation: str
+    adherence_to_script_score: int = Field(..., ge=0, le=100)
+    adherence_to_script_explanation: str
+    actively_listening_score: int = Field(..., ge=0, le=100)
+    actively_listening_explanation: str
+    fumble_score: int = Field(..., ge=0, le=100)
+    fumble_explanation: str
+    probing_score: int = Field(..., ge=0, le=100)
+    probing_explanation: str
+    closing_score: int = Field(..., ge=0, le=100)
+    closing_explanation: str
+    overall_score: int = Field(..., ge=0, le=100)
+    overall_explanation: str
+    summary: str
+    call_outcome: CallOutcome
+
 class CallAnalysisResult(BaseModel):
     audio_id: str
     analysis: Dict[str, Any]
@@ -130,3 +161,9 @@ class RecordingDetail(BaseModel):
         json_encoders = {
             datetime: lambda v: v.isoformat() 
         }
+
+
+class JobCreateRequest(BaseModel):
+    kind: Literal["diarize", "analyze"]
+    audio_id: str
+    use_cache: bool = True
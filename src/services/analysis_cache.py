@@ -0,0 +1,121 @@
+"""
+Persistent cache of LLM call analyses.
+
+Entries are keyed by a hash of everything that determines the model's answer
+(formatted conversation, prompt template version, model name and options),
+so re-analysing an unchanged call skips the Ollama round trip entirely.
+"""
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.config.log_config import logger
+from src.config.pydantic_config import settings
+from src.models.model import LLMAnalysisCache
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, amount: int = 1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def make_cache_key(conversation_text: str, prompt_version: str, model: str, options: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        {
+            "conversation": conversation_text,
+            "prompt_version": prompt_version,
+            "model": model,
+            "options": options,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_analysis(db: Session, cache_key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Return (raw_response, parsed_analysis) for a live entry, or None."""
+    entry = db.query(LLMAnalysisCache).filter(LLMAnalysisCache.cache_key == cache_key).first()
+    if entry is None:
+        _count("misses")
+        return None
+
+    now = datetime.utcnow()
+    if entry.created_at and entry.created_at < now - timedelta(hours=settings.analysis_cache_ttl_hours):
+        db.delete(entry)
+        _count("misses")
+        _count("evictions")
+        return None
+
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_accessed_at = now
+    _count("hits")
+    return entry.raw_response, entry.parsed_analysis
+
+
+def store_analysis(
+    db: Session,
+    cache_key: str,
+    model: str,
+    prompt_version: str,
+    raw_response: str,
+    parsed_analysis: Dict[str, Any],
+):
+    """Add or replace a cache entry and apply the TTL/size eviction policy. Committed with the caller's transaction."""
+    now = datetime.utcnow()
+    db.merge(LLMAnalysisCache(
+        cache_key=cache_key,
+        model=model,
+        prompt_version=prompt_version,
+        raw_response=raw_response,
+        parsed_analysis=parsed_analysis,
+        hit_count=0,
+        created_at=now,
+        last_accessed_at=now,
+    ))
+    db.flush()
+    _count("stores")
+    evict(db)
+
+
+def evict(db: Session) -> int:
+    """Drop expired entries, then the least recently used ones beyond the size budget."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.analysis_cache_ttl_hours)
+    removed = (
+        db.query(LLMAnalysisCache)
+        .filter(LLMAnalysisCache.created_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+
+    overflow = db.query(LLMAnalysisCache).count() - settings.analysis_cache_max_entries
+    if overflow > 0:
+        oldest = (
+            db.query(LLMAnalysisCache.cache_key)
+            .order_by(LLMAnalysisCache.last_accessed_at.asc())
+            .limit(overflow)
+            .subquery()
+        )
+        removed += (
+            db.query(LLMAnalysisCache)
+            .filter(LLMAnalysisCache.cache_key.in_(oldest.select()))
+            .delete(synchronize_session=False)
+        )
+
+    if removed:
+        _count("evictions", removed)
+        logger.info(f"Evicted {removed} LLM analysis cache entries")
+    return removed
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
@@ -0,0 +1,159 @@
+"""
+Pluggable Whisper backends.
+
+All backends take 16 kHz float32 segments and return plain text, or text plus
+word timestamps relative to each segment. ASR_BACKEND selects one:
+
+- "transformers": openai/whisper-* through transformers (fp32 on CPU)
+- "transformers-int8": the same weights with torch dynamic int8 quantization of the Linear layers
+- "faster-whisper": CTranslate2 int8 weights via faster-whisper, the fastest option on CPU
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.config.pydantic_config import settings
+from src.services.model_registry import model_registry
+
+WordList = List[Dict]
+
+
+class ASRBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def transcribe(self, segments: List[np.ndarray], sr: int) -> List[str]:
+        """One transcript per segment, in input order."""
+
+    @abstractmethod
+    def transcribe_words(self, segments: List[np.ndarray], sr: int, batch_size: int = 1) -> List[Tuple[str, WordList]]:
+        """(text, words) per segment; word start/end are seconds from the segment start."""
+
+
+class TransformersWhisperBackend(ASRBackend):
+    def __init__(self, model_name: str, quantize: bool = False):
+        import torch
+        from transformers import WhisperProcessor, WhisperForConditionalGeneration, pipeline as hf_pipeline
+
+        self.name = "transformers-int8" if quantize else "transformers"
+        self._torch = torch
+        # Dynamic quantization only has CPU kernels
+        self.use_cuda = torch.cuda.is_available() and not quantize
+
+        self.processor = WhisperProcessor.from_pretrained(model_name)
+        self.model = WhisperForConditionalGeneration.from_pretrained(model_name)
+        if quantize:
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        elif self.use_cuda:
+            self.model = self.model.to("cuda")
+        self.model.eval()
+
+        # Same weights, wrapped for word-level timestamps (single-pass diarization)
+        self.asr = hf_pipeline(
+            "automatic-speech-recognition",
+            model=self.model,
+            tokenizer=self.processor.tokenizer,
+            feature_extractor=self.processor.feature_extractor,
+            device=0 if self.use_cuda else -1,
+        )
+
+    def transcribe(self, segments: List[np.ndarray], sr: int) -> List[str]:
+        processed = self.processor(segments, sampling_rate=sr, return_tensors="pt", return_attention_mask=True)
+        if self.use_cuda:
+            processed = {k: v.to("cuda") for k, v in processed.items()}
+        with self._torch.no_grad():
+            generated_ids = self.model.generate(
+                input_features=processed["input_features"],
+                attention_mask=processed["attention_mask"],
+                language="en",
+                task="transcribe"
+            )
+        return [text.strip() for text in self.processor.batch_decode(generated_ids, skip_special_tokens=True)]
+
+    def transcribe_words(self, segments: List[np.ndarray], sr: int, batch_size: int = 1) -> List[Tuple[str, WordList]]:
+        inputs = [{"raw": segment, "sampling_rate": sr} for segment in segments]
+        results = self.asr(
+            inputs,
+            batch_size=batch_size,
+            return_timestamps="word",
+            generate_kwargs={"language": "en", "task": "transcribe"}
+        )
+
+        output = []
+        for segment, result in zip(segments, results):
+            words = []
+            for word in result.get("chunks", []):
+                word_start, word_end = word.get("timestamp", (None, None))
+                word_text = word.get("text", "").strip()
+                if word_start is None or not word_text:
+                    continue
+                if word_end is None:
+                    word_end = len(segment) / sr
+                words.append({"text": word_text, "start": word_start, "end": word_end})
+            output.append((result.get("text", "").strip(), words))
+        return output
+
+
+class FasterWhisperBackend(ASRBackend):
+    name = "faster-whisper"
+
+    def __init__(self, model_name: str, compute_type: str = "int8", cpu_threads: int = 0, beam_size: int = 1):
+        import ctranslate2
+        from faster_whisper import WhisperModel
+
+        device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+        self.beam_size = beam_size
+        self.model = WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+    def _run(self, segment: np.ndarray, word_timestamps: bool) -> Tuple[str, WordList]:
+        results, _ = self.model.transcribe(
+            segment.astype(np.float32, copy=False),
+            language="en",
+            task="transcribe",
+            beam_size=self.beam_size,
+            word_timestamps=word_timestamps,
+            condition_on_previous_text=False,
+            vad_filter=False,
+        )
+        # transcribe() is lazy: decoding happens while iterating
+        results = list(results)
+        text = " ".join(result.text.strip() for result in results).strip()
+        words = [
+            {"text": word.word.strip(), "start": word.start, "end": word.end}
+            for result in results
+            for word in (result.words or [])
+            if word.word.strip()
+        ]
+        return text, words
+
+    def transcribe(self, segments: List[np.ndarray], sr: int) -> List[str]:
+        return [self._run(segment, word_timestamps=False)[0] for segment in segments]
+
+    def transcribe_words(self, segments: List[np.ndarray], sr: int, batch_size: int = 1) -> List[Tuple[str, WordList]]:
+        return [self._run(segment, word_timestamps=True) for segment in segments]
+
+
+def build_asr_backend(name: str = None) -> ASRBackend:
+    name = name or settings.asr_backend
+    if name == "transformers":
+        return TransformersWhisperBackend(settings.asr_model)
+    if name == "transformers-int8":
+        return TransformersWhisperBackend(settings.asr_model, quantize=True)
+    if name == "faster-whisper":
+        return FasterWhisperBackend(
+            settings.faster_whisper_model,
+            compute_type=settings.faster_whisper_compute_type,
+            cpu_threads=settings.asr_cpu_threads,
+            beam_size=settings.faster_whisper_beam_size,
+        )
+    raise ValueError(f"Unknown ASR backend '{name}'")
+
+
+ASR_MODEL_KEY = f"asr:{settings.asr_backend}"
+model_registry.register(ASR_MODEL_KEY, build_asr_backend)
+
+
+def get_asr_backend() -> ASRBackend:
+    """The configured backend, built once per process on first use."""
+    return model_registry.get(ASR_MODEL_KEY)
@@ -0,0 +1,187 @@
+"""
+Incremental sync of the RingCentral call log into Postgres.
+
+The watermark is the time the previous complete run started. A call only
+appears in the log once it has ended, and the API filters on its start time,
+so each run asks for calls that started up to call_log_sync_max_call_minutes +
+call_log_sync_publish_lag_minutes before that watermark: every call that was
+still in progress (or not yet published) during the previous run is fetched
+again. Records are upserted into call_log_records by id, so the overlap never
+creates duplicates. Consumers
+such as the scheduler then read the window they need from Postgres instead of
+paging through the API on every run. The same table serves recording_id ->
+call-log metadata lookups for /call_details, kept current by run_call_log_sync.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.config.log_config import logger
+from src.config.pydantic_config import settings
+from src.database.database import SessionLocal
+from src.models.model import CallLogRecord, SyncState, TokenStore
+from src.services import ringcentral
+from src.services.ringcentral import AuthorizedRequest, absolute_url
+from src.utils.utils import refresh_ringcentral_token
+
+CALL_LOG_URL = "https://platform.ringcentral.com/restapi/v1.0/account/~/call-log"
+CALL_LOG_SYNC_NAME = "call_log"
+UPSERT_BATCH_SIZE = 500
+
+# One sync at a time per process; concurrent runs would only re-fetch the same pages
+_sync_lock = threading.Lock()
+
+
+def parse_start_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _format_time(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _row(record: Dict[str, Any], synced_at: datetime) -> Dict[str, Any]:
+    return {
+        "id": str(record.get("id")),
+        "recording_id": (record.get("recording") or {}).get("id"),
+        "start_time": parse_start_time(record.get("startTime")),
+        "direction": record.get("direction"),
+        "duration": record.get("duration"),
+        "from_name": record.get("from", {}).get("name"),
+        "from_extension_id": record.get("from", {}).get("extensionId"),
+        "to_phone_number": record.get("to", {}).get("phoneNumber"),
+        "record": record,
+        "synced_at": synced_at,
+    }
+
+
+def store_call_log_records(db: Session, records: List[Dict[str, Any]]) -> int:
+    """Upsert raw call-log records (one statement per batch). Committed with the caller's transaction."""
+    synced_at = datetime.utcnow()
+    rows = [_row(record, synced_at) for record in records if record.get("id")]
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        statement = insert(CallLogRecord).values(rows[start:start + UPSERT_BATCH_SIZE])
+        statement = statement.on_conflict_do_update(
+            index_elements=[CallLogRecord.id],
+            set_={
+                column: statement.excluded[column]
+                for column in ("recording_id", "start_time", "direction", "duration", "from_name",
+                               "from_extension_id", "to_phone_number", "record", "synced_at")
+            }
+        )
+        db.execute(statement)
+    return len(rows)
+
+
+def _sync_state(db: Session) -> SyncState:
+    state = db.query(SyncState).filter(SyncState.name == CALL_LOG_SYNC_NAME).first()
+    if state is None:
+        state = SyncState(name=CALL_LOG_SYNC_NAME, last_record_count=0)
+        db.add(state)
+    return state
+
+
+def sync_call_log(db: Session, request: AuthorizedRequest, initial_hours: Optional[float] = None) -> int:
+    """
+    Fetch call-log records that may have been published since the previous run and store them.
+    Without a watermark, the last initial_hours (default call_log_sync_initial_hours) are fetched.
+    Returns the number of records fetched. The watermark only moves forward once every page is stored.
+    """
+    with _sync_lock:
+        state = _sync_state(db)
+        now = datetime.now(timezone.utc)
+        if state.watermark is not None:
+            lookback = settings.call_log_sync_max_call_minutes + settings.call_log_sync_publish_lag_minutes
+            date_from = state.watermark - timedelta(minutes=lookback)
+        else:
+            date_from = now - timedelta(hours=initial_hours or settings.call_log_sync_initial_hours)
+
+        params = {
+            "withRecording": "true",
+            "perPage": settings.call_log_sync_page_size,
+            "dateFrom": _format_time(date_from),
+            "view": "Detailed"
+        }
+        url = CALL_LOG_URL
+        fetched = 0
+        pages = 0
+
+        try:
+            while url:
+                response = request("GET", url, params=params)
+                if response.status_code != 200:
+                    raise RuntimeError(f"Call log request failed with status {response.status_code}: {response.text[:200]}")
+
+                response_json = response.json()
+                records = response_json.get("records", [])
+                fetched += store_call_log_records(db, records)
+                pages += 1
+
+                next_page_uri = response_json.get("navigation", {}).get("nextPage", {}).get("uri")
+                url = absolute_url(next_page_uri) if next_page_uri else None
+                params = None
+
+            # Everything that had ended and been published before this run started is stored now
+            state.watermark = now
+            state.last_run_at = datetime.utcnow()
+            state.last_record_count = fetched
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        logger.info(f"Call log sync fetched {fetched} records in {pages} pages since {_format_time(date_from)}; watermark {state.watermark}")
+        return fetched
+
+
+def call_log_records_since(db: Session, since: datetime) -> List[Dict[str, Any]]:
+    """Raw call-log records that started at or after since, oldest first."""
+    rows = (
+        db.query(CallLogRecord.record)
+        .filter(CallLogRecord.start_time >= since)
+        .order_by(CallLogRecord.start_time)
+        .all()
+    )
+    return [row.record for row in rows]
+
+
+def find_call_log_record(db: Session, recording_id: str) -> Optional[Dict[str, Any]]:
+    """Raw call-log record of a recording from the local index, or None on a miss."""
+    row = (
+        db.query(CallLogRecord.record)
+        .filter(CallLogRecord.recording_id == recording_id)
+        .order_by(CallLogRecord.start_time.desc())
+        .first()
+    )
+    return row.record if row else None
+
+
+def authorized_request(db: Session) -> AuthorizedRequest:
+    """RingCentral request function using the stored token, refreshed once on a 401."""
+    token = {"access_token": db.query(TokenStore.access_token).scalar()}
+
+    def request(method: str, url: str, **kwargs):
+        response = ringcentral.request(method, url, access_token=token["access_token"], **kwargs)
+        if response.status_code == 401:
+            token["access_token"] = refresh_ringcentral_token(db)
+            response = ringcentral.request(method, url, access_token=token["access_token"], **kwargs)
+        return response
+
+    return request
+
+
+def run_call_log_sync():
+    """Background job: keep call_log_records current between scheduler runs."""
+    db = SessionLocal()
+    try:
+        sync_call_log(db, authorized_request(db))
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Call log sync job failed: {str(e)}")
+    finally:
+        db.close()
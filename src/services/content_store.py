@@ -0,0 +1,88 @@
+"""
+Content-addressed reuse of preprocessed recordings.
+
+Downloads are hashed (SHA-256) while they stream to disk. When the same bytes
+were already preprocessed, for example a manual re-upload or a scheduler retry
+after a failed diarize, the existing preprocessed WAV and Audio metadata are
+reused and decode + noise reduction are skipped.
+"""
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from src.config.log_config import logger
+from src.models.model import Audio
+
+_stats = {"hits": 0, "misses": 0, "bytes_saved": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, amount: int = 1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def find_preprocessed(db: Session, content_hash: Optional[str]) -> Optional[Audio]:
+    """Most recent Audio row with these bytes whose preprocessed file is still on disk."""
+    if not content_hash:
+        return None
+
+    candidates = (
+        db.query(Audio)
+        .filter(Audio.content_hash == content_hash)
+        .order_by(Audio.uploaded_at.desc())
+        .all()
+    )
+    for audio in candidates:
+        # processed_path == original_path means preprocessing failed for that row
+        if audio.processed_path != audio.original_path and audio.processed_path and os.path.exists(audio.processed_path):
+            _count("hits")
+            return audio
+
+    _count("misses")
+    return None
+
+
+def reuse_preprocessed(db: Session, existing: Audio, audio_id: str, recording_id: str, duplicate_path: Path) -> Audio:
+    """
+    Register a duplicate download against an existing preprocessed recording.
+    The same recording returns its existing row; another recording gets a new row sharing the files.
+    """
+    duplicate_size = duplicate_path.stat().st_size if duplicate_path.exists() else 0
+    if existing.original_path and os.path.exists(existing.original_path):
+        duplicate_path.unlink(missing_ok=True)
+        original_path = existing.original_path
+    else:
+        original_path = str(duplicate_path)
+    _count("bytes_saved", duplicate_size)
+
+    if existing.recording_id == recording_id:
+        logger.info(f"Recording {recording_id} already preprocessed as {existing.id}, reusing it")
+        return existing
+
+    db_audio = Audio(
+        id=audio_id,
+        original_filename=Path(original_path).name,
+        original_path=original_path,
+        processed_path=existing.processed_path,
+        file_type=existing.file_type,
+        processed=False,
+        uploaded_at=datetime.utcnow(),
+        recording_id=recording_id,
+        content_hash=existing.content_hash,
+    )
+    db.add(db_audio)
+    logger.info(f"Recording {recording_id} has the same content as {existing.recording_id}, reusing {existing.processed_path}")
+    return db_audio
+
+
+def content_store_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
@@ -0,0 +1,195 @@
+"""
+Cached RingCentral extension directory (extension id -> extension number).
+
+The account's extension list is fetched in bulk (a handful of paginated calls)
+and kept in Postgres and in memory. It is refreshed once the TTL expires, so
+the per-recording extension lookup no longer costs an API call. Only ids
+missing from a fresh directory fall back to the per-id endpoint. The time of
+the last complete bulk refresh is kept in sync_state, so rows added by single
+lookups never make a partial table look fresh.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.config.log_config import logger
+from src.config.pydantic_config import settings
+from src.models.model import ExtensionDirectoryEntry, SyncState
+from src.services.ringcentral import AuthorizedRequest, absolute_url
+
+EXTENSION_LIST_URL = "https://platform.ringcentral.com/restapi/v1.0/account/~/extension"
+EXTENSION_PAGE_SIZE = 1000
+EXTENSION_DIRECTORY_SYNC_NAME = "extension_directory"
+
+_directory: Dict[str, Optional[str]] = {}
+_refreshed_at: Optional[datetime] = None
+# After a failed bulk refresh, lookups go straight to the per-id endpoint until this (monotonic) time
+_retry_refresh_at = 0.0
+_lock = threading.Lock()
+
+_stats = {"hits": 0, "misses": 0, "refreshes": 0, "api_calls": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, amount: int = 1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _is_fresh(refreshed_at: Optional[datetime]) -> bool:
+    if refreshed_at is None:
+        return False
+    return refreshed_at > datetime.utcnow() - timedelta(hours=settings.extension_directory_ttl_hours)
+
+
+def _store_entries(db: Session, rows):
+    if not rows:
+        return
+    statement = insert(ExtensionDirectoryEntry).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[ExtensionDirectoryEntry.extension_id],
+        set_={
+            column: statement.excluded[column]
+            for column in ("extension_number", "name", "status", "updated_at")
+        }
+    )
+    db.execute(statement)
+
+
+def _load_from_db(db: Session) -> bool:
+    """Fill the in-memory directory from the table if the last bulk refresh is within the TTL."""
+    global _refreshed_at
+    refreshed_at = (
+        db.query(SyncState.last_run_at)
+        .filter(SyncState.name == EXTENSION_DIRECTORY_SYNC_NAME)
+        .scalar()
+    )
+    if not _is_fresh(refreshed_at):
+        return False
+
+    entries = db.query(ExtensionDirectoryEntry.extension_id, ExtensionDirectoryEntry.extension_number).all()
+    _directory.clear()
+    _directory.update({extension_id: number for extension_id, number in entries})
+    _refreshed_at = refreshed_at
+    logger.info(f"Loaded {len(entries)} extensions from the extension directory table")
+    return True
+
+
+def refresh_directory(db: Session, request: AuthorizedRequest) -> int:
+    """Fetch every extension of the account page by page and replace the cached directory."""
+    global _refreshed_at
+    now = datetime.utcnow()
+    rows = []
+    url = EXTENSION_LIST_URL
+    params = {"perPage": EXTENSION_PAGE_SIZE}
+
+    while url:
+        response = request("GET", url, params=params)
+        _count("api_calls")
+        if response.status_code != 200:
+            raise RuntimeError(f"Extension list request failed with status {response.status_code}: {response.text[:200]}")
+
+        response_json = response.json()
+        for record in response_json.get("records", []):
+            rows.append({
+                "extension_id": str(record.get("id")),
+                "extension_number": record.get("extensionNumber"),
+                "name": record.get("name"),
+                "status": record.get("status"),
+                "updated_at": now,
+            })
+
+        next_page_uri = response_json.get("navigation", {}).get("nextPage", {}).get("uri")
+        url = absolute_url(next_page_uri) if next_page_uri else None
+        params = None
+
+    _store_entries(db, rows)
+    db.merge(SyncState(name=EXTENSION_DIRECTORY_SYNC_NAME, last_run_at=now, last_record_count=len(rows)))
+    db.commit()
+    _directory.clear()
+    _directory.update({row["extension_id"]: row["extension_number"] for row in rows})
+    _refreshed_at = now
+    _count("refreshes")
+    logger.info(f"Refreshed extension directory with {len(rows)} extensions")
+    return len(rows)
+
+
+def ensure_directory(db: Session, request: AuthorizedRequest):
+    """Make sure the in-memory directory is within its TTL, loading from Postgres or the API as needed."""
+    global _retry_refresh_at
+    with _lock:
+        if _is_fresh(_refreshed_at) or time.monotonic() < _retry_refresh_at:
+            return
+        if _load_from_db(db):
+            return
+        try:
+            refresh_directory(db, request)
+        except Exception as e:
+            db.rollback()
+            _retry_refresh_at = time.monotonic() + settings.extension_directory_retry_minutes * 60
+            logger.warning(
+                f"Failed to refresh extension directory, using per-id lookups for "
+                f"{settings.extension_directory_retry_minutes} minutes: {e}"
+            )
+
+
+def _fetch_single(db: Session, request: AuthorizedRequest, extension_id: str) -> Optional[str]:
+    response = request("GET", f"{EXTENSION_LIST_URL}/{extension_id}")
+    _count("api_calls")
+    if response.status_code != 200:
+        logger.warning(f"Unexpected status code {response.status_code} while fetching extension number for ID {extension_id}")
+        return None
+
+    record = response.json()
+    extension_number = record.get("extensionNumber")
+    # Freshness comes from the bulk refresh time in sync_state, not from row timestamps
+    _store_entries(db, [{
+        "extension_id": extension_id,
+        "extension_number": extension_number,
+        "name": record.get("name"),
+        "status": record.get("status"),
+        "updated_at": datetime.utcnow(),
+    }])
+    db.commit()
+    return extension_number
+
+
+def lookup_extension_number(db: Session, request: AuthorizedRequest, extension_id) -> Optional[str]:
+    """Extension number for a RingCentral extension id, from the cached directory when possible."""
+    if not extension_id:
+        return None
+    extension_id = str(extension_id)
+
+    ensure_directory(db, request)
+    with _lock:
+        if extension_id in _directory:
+            _count("hits")
+            return _directory[extension_id]
+
+    # New extension since the last refresh (or the refresh failed): fall back to the per-id endpoint
+    _count("misses")
+    try:
+        extension_number = _fetch_single(db, request, extension_id)
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Failed to fetch extension number for ID {extension_id}: {e}")
+        return None
+
+    with _lock:
+        _directory[extension_id] = extension_number
+    return extension_number
+
+
+def extension_directory_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    with _lock:
+        stats["entries"] = len(_directory)
+        stats["refreshed_at"] = _refreshed_at.isoformat() if _refreshed_at else None
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
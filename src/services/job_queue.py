@@ -0,0 +1,231 @@
+"""
+Durable inference job queue backed by the inference_jobs table.
+
+The API (and the scheduler) enqueue diarization/analysis jobs; worker.py
+processes claim them with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+workers on any number of hosts can share one queue without double-processing.
+Running jobs send heartbeats; a job whose worker died is reclaimed once its
+heartbeat is older than JOB_LEASE_SECONDS, unless it has used up its attempts
+(a job that keeps killing its worker is failed instead of retried forever).
+Results are only recorded by the worker that currently holds the job.
+"""
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.config.log_config import logger
+from src.config.pydantic_config import settings
+from src.database.database import SessionLocal
+from src.models.model import InferenceJob
+
+ACTIVE_STATUSES = ("queued", "running")
+JOB_KINDS = ("diarize", "analyze")
+
+
+def job_key(kind: str, audio_id: str) -> str:
+    return f"{kind}:{audio_id}"
+
+
+def job_summary(job: InferenceJob) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "audio_id": job.audio_id,
+        "recording_id": job.recording_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.error,
+        "result": job.result,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "status_url": f"/jobs/{job.id}",
+    }
+
+
+def enqueue_job(
+    db: Session,
+    kind: str,
+    audio_id: str,
+    recording_id: Optional[str] = None,
+    payload: Optional[Dict[str, Any]] = None,
+) -> InferenceJob:
+    """Queue a job, or return the queued/running job that already exists for the same key."""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    key = job_key(kind, audio_id)
+
+    existing = (
+        db.query(InferenceJob)
+        .filter(InferenceJob.key == key, InferenceJob.status.in_(ACTIVE_STATUSES))
+        .first()
+    )
+    if existing is not None:
+        return existing
+
+    job = InferenceJob(
+        id=str(uuid.uuid4()),
+        kind=kind,
+        key=key,
+        audio_id=audio_id,
+        recording_id=recording_id,
+        status="queued",
+        payload=payload or {},
+        attempts=0,
+        max_attempts=settings.job_max_attempts,
+        created_at=datetime.utcnow(),
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request queued the same key between our check and insert
+        db.rollback()
+        return (
+            db.query(InferenceJob)
+            .filter(InferenceJob.key == key, InferenceJob.status.in_(ACTIVE_STATUSES))
+            .one()
+        )
+    logger.info(f"Queued {kind} job {job.id} for audio {audio_id}")
+    return job
+
+
+def claim_job(db: Session, worker_id: str, kinds: Optional[Iterable[str]] = None) -> Optional[InferenceJob]:
+    """Lock and take the oldest runnable job, skipping rows other workers hold."""
+    stale = datetime.utcnow() - timedelta(seconds=settings.job_lease_seconds)
+    query = db.query(InferenceJob).filter(
+        or_(
+            InferenceJob.status == "queued",
+            and_(InferenceJob.status == "running", InferenceJob.heartbeat_at < stale),
+        )
+    )
+    if kinds:
+        query = query.filter(InferenceJob.kind.in_(list(kinds)))
+
+    while True:
+        job = query.order_by(InferenceJob.created_at).with_for_update(skip_locked=True).first()
+        if job is None:
+            db.commit()
+            return None
+        if job.status != "running" or (job.attempts or 0) < job.max_attempts:
+            break
+        # The worker died on every attempt (OOM, segfault): do not hand the job to yet another worker
+        logger.error(f"Job {job.id} lost its worker {job.worker_id} on all {job.attempts} attempts, marking it failed")
+        job.status = "failed"
+        job.error = f"Worker stopped responding on all {job.attempts} attempts"
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+    if job.status == "running":
+        logger.warning(f"Reclaiming job {job.id} from unresponsive worker {job.worker_id}")
+    now = datetime.utcnow()
+    job.status = "running"
+    job.attempts = (job.attempts or 0) + 1
+    job.worker_id = worker_id
+    job.started_at = now
+    job.heartbeat_at = now
+    db.commit()
+    return job
+
+
+def _update_if_owner(db: Session, job_id: str, worker_id: str, values: Dict[Any, Any]) -> bool:
+    """Update the job only while this worker still holds it; False if it was reclaimed meanwhile."""
+    updated = (
+        db.query(InferenceJob)
+        .filter(InferenceJob.id == job_id, InferenceJob.worker_id == worker_id, InferenceJob.status == "running")
+        .update(values, synchronize_session=False)
+    )
+    db.commit()
+    if not updated:
+        logger.warning(f"Job {job_id} is no longer held by worker {worker_id}; not recording its outcome")
+    return bool(updated)
+
+
+def complete_job(db: Session, job: InferenceJob, worker_id: str, result: Optional[Dict[str, Any]]) -> bool:
+    return _update_if_owner(db, job.id, worker_id, {
+        InferenceJob.status: "succeeded",
+        InferenceJob.result: result,
+        InferenceJob.error: None,
+        InferenceJob.finished_at: datetime.utcnow(),
+    })
+
+
+def fail_job(db: Session, job: InferenceJob, worker_id: str, error: str, retry: bool = True) -> bool:
+    """Requeue the job unless it is out of attempts (or the error is permanent)."""
+    if retry and job.attempts < job.max_attempts:
+        values = {InferenceJob.status: "queued"}
+    else:
+        values = {InferenceJob.status: "failed", InferenceJob.finished_at: datetime.utcnow()}
+    values[InferenceJob.error] = error
+    return _update_if_owner(db, job.id, worker_id, values)
+
+
+def _heartbeat(job_id: str, worker_id: str, stop: threading.Event):
+    while not stop.wait(settings.job_heartbeat_seconds):
+        db = SessionLocal()
+        try:
+            db.query(InferenceJob).filter(InferenceJob.id == job_id, InferenceJob.worker_id == worker_id).update(
+                {InferenceJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            logger.error(f"Heartbeat for job {job_id} failed: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+
+
+def run_job(db: Session, job: InferenceJob, handlers: Dict[str, Callable[[InferenceJob, Session], Any]]):
+    """Execute one claimed job with its handler and record the outcome."""
+    # Read while the claim is fresh; the row's worker_id changes if another worker reclaims the job
+    job_id, worker_id, attempts = job.id, job.worker_id, job.attempts
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job_id, worker_id, stop), daemon=True)
+    heartbeat.start()
+    start = time.perf_counter()
+    try:
+        result = handlers[job.kind](job, db)
+        if hasattr(result, "model_dump"):
+            result = result.model_dump(mode="json")
+        if complete_job(db, job, worker_id, result):
+            logger.info(f"Job {job_id} ({job.kind}) succeeded in {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        db.rollback()
+        # 4xx errors (unknown audio_id, missing file) will not fix themselves on retry
+        permanent = isinstance(e, HTTPException) and e.status_code < 500
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        logger.error(f"Job {job_id} ({job.kind}) failed on attempt {attempts}: {detail}")
+        fail_job(db, job, worker_id, str(detail), retry=not permanent)
+    finally:
+        stop.set()
+
+
+def wait_for_job(job_id: str, timeout: Optional[float] = None, poll_seconds: Optional[float] = None) -> InferenceJob:
+    """Block until the job finishes; used by the scheduler in queue mode."""
+    timeout = timeout if timeout is not None else settings.job_wait_timeout_seconds
+    poll_seconds = poll_seconds or settings.job_poll_seconds
+    deadline = time.monotonic() + timeout
+    while True:
+        db = SessionLocal()
+        try:
+            job = db.query(InferenceJob).filter(InferenceJob.id == job_id).one()
+            if job.status not in ACTIVE_STATUSES:
+                db.expunge(job)
+                return job
+        finally:
+            db.close()
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Job {job_id} did not finish within {timeout:.0f}s")
+        time.sleep(poll_seconds)
+
+
+def queue_stats(db: Session) -> Dict[str, int]:
+    rows = db.query(InferenceJob.status, func.count(InferenceJob.id)).group_by(InferenceJob.status).all()
+    return {status: count for status, count in rows}
@@ -0,0 +1,105 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Set
+
+from src.config.log_config import logger
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of heavy models (pipelines, ASR weights).
+    Each model is built lazily on first use, exactly once, even when several
+    threads ask for it at the same time.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._load_times: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._loading: Set[str] = set()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """Register a zero-argument loader under a name. Nothing is loaded yet."""
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> Any:
+        """Return the model registered under name, building it on first call."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f"No model registered under '{name}'")
+            name_lock = self._locks[name]
+
+        with name_lock:
+            model = self._models.get(name)
+            if model is None:
+                self._loading.add(name)
+                start = time.perf_counter()
+                try:
+                    model = self._loaders[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                finally:
+                    self._loading.discard(name)
+                elapsed = time.perf_counter() - start
+                self._models[name] = model
+                self._load_times[name] = elapsed
+                self._errors.pop(name, None)
+                logger.info(f"Loaded model '{name}' in {elapsed:.2f}s")
+            return model
+
+    def warm_up(self, names: Iterable[str] = None) -> Dict[str, float]:
+        """Load the given models (all registered ones by default) and return their load times."""
+        with self._lock:
+            names = list(names) if names is not None else list(self._loaders)
+        for name in names:
+            self.get(name)
+        return {name: self._load_times[name] for name in names}
+
+    def warm_up_in_background(self, names: Iterable[str] = None) -> threading.Thread:
+        """Load models on a daemon thread so startup is not blocked; failures are logged, not raised."""
+        names = list(names) if names is not None else None
+
+        def _run():
+            for name in names if names is not None else list(self._loaders):
+                try:
+                    self.get(name)
+                except Exception as e:
+                    logger.error(f"Background warm-up of '{name}' failed: {str(e)}")
+
+        thread = threading.Thread(target=_run, name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self, names: Iterable[str] = None) -> Dict[str, str]:
+        """'ready', 'loading', 'failed: <error>' or 'not loaded' for each model."""
+        names = list(names) if names is not None else list(self._loaders)
+        statuses = {}
+        for name in names:
+            if name in self._models:
+                statuses[name] = "ready"
+            elif name in self._loading:
+                statuses[name] = "loading"
+            elif name in self._errors:
+                statuses[name] = f"failed: {self._errors[name]}"
+            else:
+                statuses[name] = "not loaded"
+        return statuses
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def load_times(self) -> Dict[str, float]:
+        return dict(self._load_times)
+
+
+model_registry = ModelRegistry()
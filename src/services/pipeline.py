@@ -0,0 +1,247 @@
+"""
+In-process call pipeline: download -> preprocess -> diarize -> analyze.
+
+The scheduler calls these directly instead of going through the app's own
+HTTP routes. The /audio and /call-analysis routes wrap the same functions.
+StagedPipeline runs the stages concurrently over a batch of recordings.
+"""
+import asyncio
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from src.config.log_config import logger
+from src.config.pydantic_config import settings
+from src.database.database import SessionLocal
+from src.models.model import Audio, InferenceJob
+from src.routes.audio import (
+    DownloadedRecording,
+    download_recording,
+    preprocess_recording,
+    run_diarization,
+    transcribe_opening,
+)
+from src.routes.call_analysis import run_call_analysis
+from src.schemas.schema import AudioUploadResponse, CallAnalysisResult, DiarizationResult
+from src.services.job_queue import enqueue_job, wait_for_job
+
+RECORDING_CONTENT_URL = "https://platform.ringcentral.com/restapi/v1.0/account/~/recording/{recording_id}/content"
+
+
+_event_loop = None
+_event_loop_lock = threading.Lock()
+
+
+def run_async(coro):
+    """
+    Run a coroutine on the pipeline's shared event loop thread and wait for it.
+    Keeping one loop lets all download workers share one pooled HTTP client.
+    """
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(target=_event_loop.run_forever, name="pipeline-event-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop).result()
+
+
+def download(recording_id: str, access_token: str, db: Session) -> DownloadedRecording:
+    """Stream the recording's audio from RingCentral to local disk."""
+    content_uri = RECORDING_CONTENT_URL.format(recording_id=recording_id)
+    return run_async(download_recording(content_uri, access_token, db, content_type="audio/mpeg"))
+
+
+def opening_transcript(downloaded: DownloadedRecording) -> str:
+    """Cheap transcript of the first seconds, for the voicemail/IVR precheck."""
+    return transcribe_opening(str(downloaded.file_path))
+
+
+def preprocess(downloaded: DownloadedRecording, db: Session) -> AudioUploadResponse:
+    """Clean up the downloaded audio (in the preprocessing pool) and register it as an Audio row."""
+    return run_async(preprocess_recording(downloaded, db))
+
+
+def _run_queued(kind: str, audio_id: str, db: Session) -> Dict[str, Any]:
+    """Hand the work to an inference worker and wait for its result."""
+    recording_id = db.query(Audio.recording_id).filter(Audio.id == audio_id).scalar()
+    job = enqueue_job(db, kind, audio_id, recording_id=recording_id)
+    finished = wait_for_job(job.id)
+    if finished.status != "succeeded":
+        raise RuntimeError(f"{kind} job {finished.id} failed: {finished.error}")
+    return finished.result
+
+
+def diarize(audio_id: str, db: Session) -> DiarizationResult:
+    """Transcribe and split the audio into speaker segments."""
+    if settings.inference_mode == "queue":
+        return DiarizationResult.model_validate(_run_queued("diarize", audio_id, db))
+    return run_diarization(audio_id, db)
+
+
+def analyze(audio_id: str, db: Session) -> CallAnalysisResult:
+    """Score the diarized call with the LLM and store the analysis."""
+    if settings.inference_mode == "queue":
+        return CallAnalysisResult.model_validate(_run_queued("analyze", audio_id, db))
+    return run_call_analysis(audio_id, db)
+
+
+# What inference workers (worker.py) run for each job kind
+JOB_HANDLERS: Dict[str, Callable[[InferenceJob, Session], Any]] = {
+    "diarize": lambda job, db: run_diarization(job.audio_id, db),
+    "analyze": lambda job, db: run_call_analysis(job.audio_id, db, (job.payload or {}).get("use_cache", True)),
+}
+
+
+@dataclass
+class RecordingJob:
+    """State carried through the stages for one RingCentral recording."""
+    recording_id: str
+    recording_data: Dict[str, Any]
+    downloaded: Optional[DownloadedRecording] = None
+    audio_id: Optional[str] = None
+    full_transcript: str = ""
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step. func(item, db) returns the item for the next stage,
+    or None to drop it (skipped or failed).
+    """
+    name: str
+    func: Callable[[Any, Session], Any]
+    workers: int = 1
+
+    def __post_init__(self):
+        # A stage without a worker would never drain its queue and the run would hang
+        if self.workers < 1:
+            logger.warning(f"Pipeline stage '{self.name}' configured with {self.workers} workers, using 1")
+            self.workers = 1
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    processed: int = 0
+    dropped: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+
+    def summary(self, wall_seconds: float) -> str:
+        handled = self.processed + self.dropped + self.failed
+        per_minute = handled / wall_seconds * 60 if wall_seconds > 0 else 0.0
+        avg = self.busy_seconds / handled if handled else 0.0
+        capacity = wall_seconds * self.workers
+        utilization = self.busy_seconds / capacity if capacity > 0 else 0.0
+        return (
+            f"{self.name}: {self.processed} passed, {self.dropped} dropped, {self.failed} failed, "
+            f"{per_minute:.2f} items/min, {avg:.1f}s avg, {utilization:.0%} busy ({self.workers} workers)"
+        )
+
+
+_SENTINEL = object()
+
+
+class StagedPipeline:
+    """
+    Runs items through a chain of stages, each with its own worker threads and a
+    bounded queue in front of it, so different items occupy different stages at once.
+    Every worker thread holds its own database session.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 4, session_factory: Callable[[], Session] = SessionLocal):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.session_factory = session_factory
+        self.stats: Dict[str, StageStats] = {}
+        self.wall_seconds = 0.0
+
+    def run(self, items: Iterable[Any]) -> List[Any]:
+        """Process all items and return those that made it through the last stage."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        self.stats = {stage.name: StageStats(stage.name, stage.workers) for stage in self.stages}
+        remaining = [stage.workers for stage in self.stages]
+        results = []
+        lock = threading.Lock()
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(index, queues, remaining, results, lock),
+                    name=f"pipeline-{stage.name}-{n}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        start = time.perf_counter()
+        for item in items:
+            queues[0].put(item)
+        for _ in range(self.stages[0].workers):
+            queues[0].put(_SENTINEL)
+
+        for thread in threads:
+            thread.join()
+        self.wall_seconds = time.perf_counter() - start
+
+        self.log_report()
+        return results
+
+    def _worker(self, index: int, queues: List[queue.Queue], remaining: List[int], results: List[Any], lock: threading.Lock):
+        stage = self.stages[index]
+        stats = self.stats[stage.name]
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(queues) else None
+        db = self.session_factory()
+
+        try:
+            while True:
+                item = inbox.get()
+                if item is _SENTINEL:
+                    break
+
+                started = time.perf_counter()
+                failed = False
+                try:
+                    result = stage.func(item, db)
+                except Exception as e:
+                    logger.error(f"Pipeline stage '{stage.name}' failed: {str(e)}")
+                    db.rollback()
+                    result = None
+                    failed = True
+                elapsed = time.perf_counter() - started
+
+                with lock:
+                    stats.busy_seconds += elapsed
+                    if failed:
+                        stats.failed += 1
+                    elif result is None:
+                        stats.dropped += 1
+                    else:
+                        stats.processed += 1
+                        if outbox is None:
+                            results.append(result)
+
+                if result is not None and outbox is not None:
+                    outbox.put(result)
+        finally:
+            db.close()
+            with lock:
+                remaining[index] -= 1
+                last_worker = remaining[index] == 0
+            # The last worker out tells the next stage that no more items are coming
+            if last_worker and outbox is not None:
+                for _ in range(self.stages[index + 1].workers):
+                    outbox.put(_SENTINEL)
+
+    def log_report(self):
+        logger.info(f"Pipeline finished in {self.wall_seconds:.1f}s")
+        for stats in self.stats.values():
+            logger.info(f"Pipeline stage {stats.summary(self.wall_seconds)}")
@@ -0,0 +1,143 @@
+"""
+Process-pool preprocessing service.
+
+librosa decoding, resampling and noise reduction are CPU-bound and hold the
+GIL, so they run in worker processes (one per core by default) instead of
+the request thread. Callers submit a job and await its result.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import psutil
+
+from src.config.log_config import logger
+from src.config.pydantic_config import settings
+from src.utils.waveform_cache import waveform_cache
+
+
+@dataclass
+class PreprocessJobStats:
+    audio_path: str
+    output_path: str
+    succeeded: bool
+    seconds: float
+    rss_before_mb: float
+    rss_after_mb: float
+    worker_pid: int
+
+
+def _run_job(
+    audio_path: str, output_path: str, return_waveform: bool
+) -> Tuple[str, Optional[np.ndarray], PreprocessJobStats]:
+    """Executed inside a worker process."""
+    # librosa/noisereduce/scipy are imported by the workers only, not by the API process
+    from src.utils.audio_preprocessing import preprocess_audio_waveform
+
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    start = time.perf_counter()
+    result_path, waveform = preprocess_audio_waveform(audio_path, output_path)
+    stats = PreprocessJobStats(
+        audio_path=audio_path,
+        output_path=output_path,
+        succeeded=result_path == output_path,
+        seconds=time.perf_counter() - start,
+        rss_before_mb=rss_before / 2**20,
+        rss_after_mb=process.memory_info().rss / 2**20,
+        worker_pid=os.getpid(),
+    )
+    return result_path, (waveform if return_waveform else None), stats
+
+
+class PreprocessingService:
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.preprocess_workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=200)
+        self._totals = {"jobs": 0, "failed": 0, "seconds": 0.0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: never fork a parent that holds model weights and threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info(f"Started preprocessing pool with {self.max_workers} workers")
+            return self._executor
+
+    def submit(self, audio_path: str, output_path: str, audio_id: Optional[str] = None) -> Future:
+        """
+        Queue a preprocessing job; the future resolves to the output (or original) path.
+        With an audio_id, the cleaned waveform is handed to the waveform cache for diarization
+        when this process runs diarization itself (inline mode); queued jobs run in worker.py.
+        """
+        return_waveform = audio_id is not None and waveform_cache.enabled and settings.inference_mode == "inline"
+        try:
+            job = self._get_executor().submit(_run_job, audio_path, output_path, return_waveform)
+        except BrokenProcessPool:
+            logger.error("Preprocessing pool is broken, restarting it")
+            self.shutdown()
+            job = self._get_executor().submit(_run_job, audio_path, output_path, return_waveform)
+
+        result = Future()
+
+        def _done(finished: Future):
+            try:
+                path, waveform, stats = finished.result()
+            except Exception as e:
+                logger.error(f"Preprocessing job for {audio_path} crashed: {str(e)}")
+                result.set_exception(e)
+                return
+            self._record(stats)
+            if waveform is not None:
+                waveform_cache.put(audio_id, waveform)
+            result.set_result(path)
+
+        job.add_done_callback(_done)
+        return result
+
+    async def preprocess(self, audio_path: str, output_path: str, audio_id: Optional[str] = None) -> str:
+        """Await a preprocessing job without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(audio_path, output_path, audio_id))
+
+    def _record(self, stats: PreprocessJobStats):
+        with self._lock:
+            self._recent.append(stats)
+            self._totals["jobs"] += 1
+            self._totals["seconds"] += stats.seconds
+            if not stats.succeeded:
+                self._totals["failed"] += 1
+        logger.info(
+            f"Preprocessed {stats.audio_path} in {stats.seconds:.2f}s "
+            f"(worker {stats.worker_pid}, RSS {stats.rss_before_mb:.0f}->{stats.rss_after_mb:.0f} MB)"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = dict(self._totals)
+            recent = [asdict(job) for job in self._recent]
+        totals["avg_seconds"] = totals["seconds"] / totals["jobs"] if totals["jobs"] else 0.0
+        totals["workers"] = self.max_workers
+        totals["recent"] = recent[-20:]
+        return totals
+
+    def shutdown(self, wait: bool = False):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+preprocessing_service = PreprocessingService()
@@ -0,0 +1,307 @@
+"""
+Shared RingCentral HTTP client with per-group rate limiting.
+
+RingCentral meters API calls per usage-plan group (Light, Medium, Heavy, Auth)
+and reports the current budget in X-Rate-Limit-* response headers. Each group
+gets a token bucket. The bucket starts from the documented default plan and is
+re-tuned from the headers of every response. A 429 empties the bucket for the
+Retry-After period, so callers wait only as long as needed instead of sleeping
+a fixed time after every page. Requests reuse one pooled requests.Session.
+The group guessed for an endpoint is replaced by the one the server reports in
+X-Rate-Limit-Group, so later calls draw from the bucket the server meters.
+"""
+import asyncio
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config.log_config import logger
+from src.config.pydantic_config import settings
+
+RINGCENTRAL_BASE_URL = "https://platform.ringcentral.com"
+
+# request(method, url, **kwargs) -> requests.Response, already authorized
+AuthorizedRequest = Callable[..., Any]
+
+# Default plan (requests per window in seconds) until the response headers say otherwise
+DEFAULT_GROUP_LIMITS = {
+    "light": (50, 60.0),
+    "medium": (40, 60.0),
+    "heavy": (10, 60.0),
+    "auth": (5, 60.0),
+}
+
+# (method, path pattern, group), first match wins; anything else is treated as "medium"
+_GROUP_RULES = [
+    (None, re.compile(r"^/restapi/oauth/"), "auth"),
+    ("GET", re.compile(r"/call-log"), "heavy"),
+    ("GET", re.compile(r"/recording/[^/]+/content"), "heavy"),
+    ("GET", re.compile(r"/recording/[^/]+$"), "light"),
+    ("GET", re.compile(r"/extension/[^/]+$"), "light"),
+    ("GET", re.compile(r"/extension$"), "medium"),
+]
+
+
+class TokenBucket:
+    """Thread-safe token bucket; reserve() returns how long the caller has to wait for its token."""
+
+    def __init__(self, name: str, limit: int, window_seconds: float):
+        self.name = name
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.tokens = float(limit)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.window_seconds
+
+    def _refill(self, now: float):
+        self.tokens = min(float(self.limit), self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Tokens may go negative: later callers queue up behind the ones already waiting
+            self.tokens -= 1
+            wait = max(0.0, -self.tokens / self.rate)
+            return max(wait, self.blocked_until - now)
+
+    def available(self) -> float:
+        with self.lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+    def update(self, limit: int, remaining: int, window_seconds: float):
+        """Re-tune the bucket from the X-Rate-Limit-* headers of a response."""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.limit = max(1, limit)
+            self.window_seconds = max(1.0, window_seconds)
+            # The server's count also covers other clients sharing the app's quota
+            self.tokens = min(self.tokens, float(remaining))
+
+    def block(self, seconds: float):
+        """After a 429: no requests in this group until the penalty has passed."""
+        with self.lock:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + seconds)
+            self.tokens = min(self.tokens, 0.0)
+            self.updated_at = now
+
+
+_buckets: Dict[str, TokenBucket] = {
+    name: TokenBucket(name, limit, window) for name, (limit, window) in DEFAULT_GROUP_LIMITS.items()
+}
+_buckets_lock = threading.Lock()
+
+# endpoint_key -> group named by the server's X-Rate-Limit-Group header
+_endpoint_groups: Dict[str, str] = {}
+_endpoint_groups_lock = threading.Lock()
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+_stats = {"requests": 0, "throttled_requests": 0, "throttled_seconds": 0.0, "rate_limited_responses": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def get_session() -> requests.Session:
+    """Process-wide requests.Session with a keep-alive connection pool."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=settings.ringcentral_max_connections,
+                pool_maxsize=settings.ringcentral_max_connections,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def absolute_url(uri: str) -> str:
+    return uri if uri.startswith("http") else f"{RINGCENTRAL_BASE_URL}{uri}"
+
+
+def _path(url: str) -> str:
+    return re.sub(r"^https?://[^/]+", "", url).split("?", 1)[0].rstrip("/")
+
+
+def endpoint_key(method: str, url: str) -> str:
+    """Method and path with id segments collapsed, e.g. 'GET /restapi/v1.0/account/~/recording/{id}/content'."""
+    path = "/".join("{id}" if any(c.isdigit() for c in segment) and segment != "v1.0" else segment
+                    for segment in _path(url).split("/"))
+    return f"{method.upper()} {path}"
+
+
+def api_group(method: str, url: str) -> str:
+    """Usage-plan group of a RingCentral endpoint: the one the server reported, else a guess from the path."""
+    with _endpoint_groups_lock:
+        learned = _endpoint_groups.get(endpoint_key(method, url))
+    if learned:
+        return learned
+    path = _path(url)
+    for rule_method, pattern, group in _GROUP_RULES:
+        if (rule_method is None or rule_method == method.upper()) and pattern.search(path):
+            return group
+    return "medium"
+
+
+def _bucket(group: str) -> TokenBucket:
+    with _buckets_lock:
+        bucket = _buckets.get(group)
+        if bucket is None:
+            limit, window = DEFAULT_GROUP_LIMITS["medium"]
+            bucket = _buckets[group] = TokenBucket(group, limit, window)
+        return bucket
+
+
+def _record_wait(group: str, wait: float):
+    if wait <= 0:
+        return
+    _count("throttled_requests")
+    _count("throttled_seconds", wait)
+    logger.info(f"RingCentral {group} rate limit: waiting {wait:.1f}s")
+
+
+def acquire(group: str):
+    """Block until the group's bucket grants one request."""
+    wait = _bucket(group).reserve()
+    _record_wait(group, wait)
+    if wait > 0:
+        time.sleep(wait)
+
+
+async def acquire_async(group: str):
+    """acquire() for coroutines: waits without blocking the event loop."""
+    wait = _bucket(group).reserve()
+    _record_wait(group, wait)
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+
+def _retry_after_seconds(headers, default: float) -> float:
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return default
+
+
+def observe_response(group: str, status_code: int, headers, endpoint: Optional[str] = None) -> Optional[float]:
+    """
+    Feed a response's rate-limit headers back into the buckets and remember which
+    group the server meters the endpoint under.
+    Returns the penalty in seconds when the response was a 429, otherwise None.
+    """
+    reported = headers.get("X-Rate-Limit-Group")
+    if reported:
+        reported = reported.lower()
+        if endpoint:
+            with _endpoint_groups_lock:
+                previous = _endpoint_groups.get(endpoint)
+                _endpoint_groups[endpoint] = reported
+            if previous is None and reported != group:
+                logger.info(f"RingCentral meters {endpoint} as {reported}, not {group}")
+        group = reported
+    bucket = _bucket(group)
+    try:
+        bucket.update(
+            int(headers["X-Rate-Limit-Limit"]),
+            int(headers["X-Rate-Limit-Remaining"]),
+            float(headers["X-Rate-Limit-Window"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        pass
+
+    if status_code != 429:
+        return None
+    penalty = _retry_after_seconds(headers, bucket.window_seconds)
+    bucket.block(penalty)
+    _count("rate_limited_responses")
+    return penalty
+
+
+def request(method: str, url: str, access_token: Optional[str] = None, headers: Optional[Dict[str, str]] = None,
+            group: Optional[str] = None, **kwargs) -> requests.Response:
+    """
+    Rate-limited RingCentral request over the pooled session.
+    429 responses are retried after Retry-After, up to ringcentral_max_retries times.
+    """
+    url = absolute_url(url)
+    endpoint = endpoint_key(method, url)
+    headers = dict(headers or {})
+    if access_token:
+        headers["Authorization"] = f"Bearer {access_token}"
+    kwargs.setdefault("timeout", settings.ringcentral_timeout_seconds)
+
+    attempt = 0
+    while True:
+        # Looked up per attempt: the first response may reveal the endpoint's real group
+        request_group = group or api_group(method, url)
+        acquire(request_group)
+        response = get_session().request(method, url, headers=headers, **kwargs)
+        _count("requests")
+        penalty = observe_response(request_group, response.status_code, response.headers, endpoint)
+        if penalty is None or attempt >= settings.ringcentral_max_retries:
+            return response
+        attempt += 1
+        logger.warning(f"RingCentral returned 429 for {method} {url}, retry {attempt}/{settings.ringcentral_max_retries} after {penalty:.0f}s")
+
+
+def download_hooks(url: str, method: str = "GET"):
+    """(before_request, on_response) for http_download.stream_download, so streamed downloads share the limiter."""
+    url = absolute_url(url)
+    endpoint = endpoint_key(method, url)
+
+    async def before_request():
+        await acquire_async(api_group(method, url))
+
+    def on_response(status_code: int, headers):
+        observe_response(api_group(method, url), status_code, headers, endpoint)
+        _count("requests")
+
+    return before_request, on_response
+
+
+def rate_limit_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["throttled_seconds"] = round(stats["throttled_seconds"], 3)
+    with _buckets_lock:
+        buckets = list(_buckets.values())
+    stats["groups"] = {
+        bucket.name: {
+            "limit": bucket.limit,
+            "window_seconds": bucket.window_seconds,
+            "available": round(max(bucket.available(), 0.0), 2),
+        }
+        for bucket in buckets
+    }
+    with _endpoint_groups_lock:
+        stats["endpoint_groups"] = dict(_endpoint_groups)
+    return stats
@@ -0,0 +1,221 @@
+"""
+On-disk layout and lifecycle of recordings under ./data.
+
+Files are sharded two levels deep by name (data/preprocessed/ab/cd/abcd....flac)
+so no directory grows past a few hundred entries. Preprocessed audio is kept as
+FLAC or 16-bit PCM WAV. Once a recording is diarized, its original download moves
+to an archive tier (transcoded to low-bitrate Opus when ffmpeg is available).
+A periodic janitor enforces archive retention and an overall size budget.
+"""
+import os
+import shutil
+import subprocess
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.config.log_config import logger
+from src.config.pydantic_config import settings
+from src.database.database import SessionLocal
+from src.models.model import Audio
+from src.utils.audio_decoder import FFMPEG_BIN
+
+DATA_DIR = Path("./data")
+UPLOAD_DIR = DATA_DIR / "uploads"
+PROCESSED_DIR = DATA_DIR / "processed"
+PREPROCESSED_DIR = DATA_DIR / "preprocessed"
+ARCHIVE_DIR = DATA_DIR / "archive"
+
+PREPROCESSED_FORMATS = {"flac": ".flac", "wav": ".wav"}
+
+
+def shard_path(root: Path, name: str) -> Path:
+    """root/ab/cd/name for a name starting with 'abcd'; the shard directories are created."""
+    stem = name.replace("-", "")
+    directory = root / stem[:2] / stem[2:4]
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / name
+
+
+def upload_path(audio_id: str, extension: str) -> Path:
+    return shard_path(UPLOAD_DIR, f"{audio_id}{extension}")
+
+
+def preprocessed_path(key: str) -> Path:
+    """Where preprocessed audio for a content hash (or audio_id) is written, in the configured format."""
+    extension = PREPROCESSED_FORMATS.get(settings.preprocessed_audio_format, ".flac")
+    return shard_path(PREPROCESSED_DIR, f"{key}{extension}")
+
+
+def _transcode_to_opus(source: Path, destination: Path) -> bool:
+    cmd = [
+        FFMPEG_BIN, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", str(source), "-vn", "-ac", "1", "-c:a", "libopus",
+        "-b:a", f"{settings.storage_archive_bitrate_kbps}k", str(destination),
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        logger.warning(f"Opus transcode of {source} failed: {proc.stderr.decode(errors='replace').strip()}")
+        destination.unlink(missing_ok=True)
+        return False
+    return True
+
+
+def archive_original(db: Session, audio: Audio) -> bool:
+    """Move (or transcode) a processed recording's original into the archive tier."""
+    source = Path(audio.original_path) if audio.original_path else None
+    if source is None or not source.exists() or ARCHIVE_DIR in source.parents:
+        return False
+
+    archived = False
+    if settings.storage_archive_codec == "opus" and FFMPEG_BIN:
+        destination = shard_path(ARCHIVE_DIR, f"{audio.id}.opus")
+        archived = _transcode_to_opus(source, destination)
+        if archived:
+            source.unlink(missing_ok=True)
+    if not archived:
+        destination = shard_path(ARCHIVE_DIR, f"{audio.id}{source.suffix}")
+        shutil.move(str(source), str(destination))
+
+    # Rows reusing the same download (content-hash hits) point at the same file; rows whose
+    # preprocessing failed use the original as their processed file too
+    db.query(Audio).filter(Audio.original_path == audio.original_path).update(
+        {Audio.original_path: str(destination)}, synchronize_session=False
+    )
+    db.query(Audio).filter(Audio.processed_path == audio.original_path).update(
+        {Audio.processed_path: str(destination)}, synchronize_session=False
+    )
+    if audio.processed_path == audio.original_path:
+        audio.processed_path = str(destination)
+    audio.original_path = str(destination)
+    return True
+
+
+def _forget_deleted_files(db: Session, paths: List[str]):
+    """Clear Audio paths that point at deleted files. Committed with the caller's transaction."""
+    for start in range(0, len(paths), 500):
+        batch = paths[start:start + 500]
+        db.query(Audio).filter(Audio.original_path.in_(batch)).update(
+            {Audio.original_path: None}, synchronize_session=False
+        )
+        db.query(Audio).filter(Audio.processed_path.in_(batch)).update(
+            {Audio.processed_path: None}, synchronize_session=False
+        )
+
+
+def _iter_files(root: Path) -> Iterator[os.DirEntry]:
+    if not root.exists():
+        return
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def _archive_processed_originals(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(hours=settings.storage_archive_after_hours)
+    candidates = (
+        db.query(Audio)
+        .filter(Audio.processed == True, Audio.uploaded_at < cutoff)  # noqa: E712
+        .filter(~Audio.original_path.startswith(str(ARCHIVE_DIR)))
+        .limit(settings.storage_janitor_batch_size)
+        .all()
+    )
+    archived = 0
+    for audio in candidates:
+        try:
+            if archive_original(db, audio):
+                archived += 1
+        except OSError as e:
+            logger.error(f"Failed to archive {audio.original_path}: {str(e)}")
+    return archived
+
+
+def _delete_expired_archives(db: Session) -> Tuple[int, int]:
+    if settings.storage_retention_days <= 0:
+        return 0, 0
+    cutoff = time.time() - settings.storage_retention_days * 86400
+    deleted, freed = [], 0
+    for entry in _iter_files(ARCHIVE_DIR):
+        stat = entry.stat()
+        if stat.st_mtime < cutoff:
+            os.unlink(entry.path)
+            deleted.append(entry.path)
+            freed += stat.st_size
+    _forget_deleted_files(db, deleted)
+    return len(deleted), freed
+
+
+def _protected_paths(db: Session) -> Set[str]:
+    """Preprocessed files still needed by recordings that have not been diarized yet."""
+    rows = db.query(Audio.processed_path).filter(Audio.processed == False).all()  # noqa: E712
+    return {os.path.abspath(path) for (path,) in rows if path}
+
+
+def _enforce_size_budget(db: Session) -> Tuple[int, int]:
+    """Delete the oldest archived originals, then the oldest unneeded preprocessed files, until under budget."""
+    budget = int(settings.storage_max_gb * 2**30)
+    if budget <= 0:
+        return 0, 0
+
+    tiers: Dict[Path, List[Tuple[float, int, str]]] = {}
+    total = 0
+    for root in (UPLOAD_DIR, PREPROCESSED_DIR, ARCHIVE_DIR, PROCESSED_DIR):
+        files = []
+        for entry in _iter_files(root):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        tiers[root] = sorted(files)
+
+    if total <= budget:
+        return 0, 0
+
+    protected = _protected_paths(db)
+    deleted, freed = [], 0
+    for root in (ARCHIVE_DIR, PREPROCESSED_DIR):
+        for _, size, path in tiers[root]:
+            if total - freed <= budget:
+                break
+            if os.path.abspath(path) in protected:
+                continue
+            os.unlink(path)
+            deleted.append(path)
+            freed += size
+    _forget_deleted_files(db, deleted)
+
+    if total - freed > budget:
+        logger.warning(
+            f"Audio storage still {(total - freed) / 2**30:.2f} GB after cleanup "
+            f"(budget {settings.storage_max_gb} GB); remaining files are still in use"
+        )
+    return len(deleted), freed
+
+
+def run_storage_janitor():
+    """Archive processed originals, drop expired archives and enforce the size budget."""
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        archived = _archive_processed_originals(db)
+        db.commit()
+        expired, expired_bytes = _delete_expired_archives(db)
+        db.commit()
+        evicted, evicted_bytes = _enforce_size_budget(db)
+        db.commit()
+        logger.info(
+            f"Storage janitor: archived {archived}, expired {expired} ({expired_bytes / 2**20:.1f} MB), "
+            f"evicted {evicted} ({evicted_bytes / 2**20:.1f} MB) in {time.perf_counter() - start:.1f}s"
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Storage janitor failed: {str(e)}")
+    finally:
+        db.close()
@@ -0,0 +1,82 @@
+"""
+Compare ASR backends on a fixed sample set: real-time factor and WER.
+
+The sample directory holds audio files with a reference transcript next to
+each one (same name, .txt). Every backend sees the same VAD windows as in
+production.
+
+    python -m src.utils.asr_benchmark samples/ --backends transformers transformers-int8 faster-whisper
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+import jiwer
+
+from src.services.asr_backends import build_asr_backend
+from src.utils.audio_decoder import decode_audio
+from src.utils.vad import plan_speech_windows
+
+SAMPLE_RATE = 16000
+AUDIO_SUFFIXES = {".wav", ".mp3", ".flac", ".opus", ".ogg"}
+
+
+def normalize_text(text: str) -> str:
+    text = re.sub(r"[^a-z0-9' ]+", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def load_samples(directory: Path):
+    samples = []
+    for path in sorted(directory.iterdir()):
+        reference = path.with_suffix(".txt")
+        if path.suffix.lower() in AUDIO_SUFFIXES and reference.exists():
+            audio = decode_audio(str(path), sr=SAMPLE_RATE)
+            windows = plan_speech_windows(audio, SAMPLE_RATE).windows
+            samples.append((path.name, audio, windows, normalize_text(reference.read_text())))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("samples", type=Path)
+    parser.add_argument("--backends", nargs="+", default=["transformers", "transformers-int8", "faster-whisper"])
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    if not samples:
+        sys.exit(f"No audio files with .txt references in {args.samples}")
+    audio_seconds = sum(len(audio) for _, audio, _, _ in samples) / SAMPLE_RATE
+    print(f"{len(samples)} samples, {audio_seconds:.1f}s of audio")
+
+    print(f"{'backend':<20} {'load s':>7} {'decode s':>9} {'RTF':>6} {'WER':>6}")
+    for name in args.backends:
+        start = time.perf_counter()
+        try:
+            backend = build_asr_backend(name)
+        except Exception as e:
+            print(f"{name:<20} failed to load: {e}")
+            continue
+        load_seconds = time.perf_counter() - start
+
+        hypotheses, references = [], []
+        start = time.perf_counter()
+        for _, audio, windows, reference in samples:
+            chunks = [audio[lo:hi] for lo, hi in windows]
+            texts = []
+            for i in range(0, len(chunks), args.batch_size):
+                texts.extend(backend.transcribe(chunks[i:i + args.batch_size], SAMPLE_RATE))
+            hypotheses.append(normalize_text(" ".join(texts)))
+            references.append(reference)
+        decode_seconds = time.perf_counter() - start
+
+        wer = jiwer.wer(references, hypotheses)
+        print(f"{name:<20} {load_seconds:>7.1f} {decode_seconds:>9.1f} {decode_seconds / audio_seconds:>6.3f} {wer:>6.3f}")
+        del backend
+
+
+if __name__ == "__main__":
+    main()
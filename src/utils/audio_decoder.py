@@ -0,0 +1,76 @@
+"""
+Single-pass audio decoding to 16 kHz mono float32.
+
+librosa.load goes through audioread for MP3, keeps float64 intermediates and
+then runs its high-quality resampler. Here ffmpeg decodes, downmixes and
+resamples in one pipe straight into a float32 buffer; when ffmpeg is not on
+PATH, soundfile decodes and soxr resamples instead.
+"""
+import shutil
+import subprocess
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+import soxr
+
+from src.config.log_config import logger
+
+DEFAULT_SAMPLE_RATE = 16000
+FFMPEG_BIN = shutil.which("ffmpeg")
+
+
+class AudioDecodeError(Exception):
+    pass
+
+
+def _decode_ffmpeg(path: str, sr: int, offset: Optional[float], duration: Optional[float]) -> np.ndarray:
+    cmd = [FFMPEG_BIN, "-nostdin", "-hide_banner", "-loglevel", "error"]
+    if offset:
+        # -ss before -i seeks in the demuxer instead of decoding up to the offset
+        cmd += ["-ss", f"{offset:.3f}"]
+    cmd += ["-i", path]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    cmd += ["-vn", "-ac", "1", "-ar", str(sr), "-f", "f32le", "-acodec", "pcm_f32le", "pipe:1"]
+
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise AudioDecodeError(proc.stderr.decode(errors="replace").strip())
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+
+def _decode_soundfile(path: str, sr: int, offset: Optional[float], duration: Optional[float]) -> np.ndarray:
+    with sf.SoundFile(path) as f:
+        native_sr = f.samplerate
+        if offset:
+            f.seek(int(offset * native_sr))
+        frames = int(duration * native_sr) if duration is not None else -1
+        y = f.read(frames=frames, dtype="float32", always_2d=True)
+
+    y = y.mean(axis=1) if y.shape[1] > 1 else y[:, 0]
+    if native_sr != sr:
+        y = soxr.resample(y, native_sr, sr)
+    return np.ascontiguousarray(y, dtype=np.float32)
+
+
+def decode_audio(
+    path: str,
+    sr: int = DEFAULT_SAMPLE_RATE,
+    offset: Optional[float] = None,
+    duration: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Decode `path` to a mono float32 array at `sr`.
+    `offset`/`duration` (seconds) decode only that window of the file.
+    """
+    if FFMPEG_BIN:
+        try:
+            return _decode_ffmpeg(path, sr, offset, duration)
+        except AudioDecodeError as e:
+            logger.warning(f"ffmpeg decode failed for {path}, falling back to soundfile: {str(e)}")
+
+    try:
+        return _decode_soundfile(path, sr, offset, duration)
+    except Exception as e:
+        raise AudioDecodeError(f"Could not decode {path}: {str(e)}") from e
@@ -0,0 +1,163 @@
+"""
+CPU-bound audio cleanup, kept free of model imports so it can run in
+preprocessing worker processes without loading Whisper or pyannote.
+"""
+from typing import Optional, Tuple
+
+import librosa
+import numpy as np
+import noisereduce as nr
+import soundfile as sf
+from scipy.signal import fftconvolve, istft, stft
+
+from src.config.log_config import logger
+from src.config.pydantic_config import settings
+from src.utils.audio_decoder import DEFAULT_SAMPLE_RATE as SAMPLE_RATE, decode_audio
+
+
+def preprocess_audio(audio_path: str, output_path: str) -> str:
+    """Preprocess audio file to improve quality"""
+    return preprocess_audio_waveform(audio_path, output_path)[0]
+
+
+def preprocess_audio_waveform(audio_path: str, output_path: str) -> Tuple[str, Optional[np.ndarray]]:
+    """
+    Same as preprocess_audio, but also return the cleaned 16 kHz float32 waveform
+    (None when preprocessing failed and the original path is returned).
+    """
+    try:
+        # Decodes, downmixes and resamples to 16 kHz float32 in one pass
+        y = decode_audio(audio_path, sr=SAMPLE_RATE)
+
+        if settings.preprocess_mode == "streaming":
+            y = clean_waveform_streaming(y, SAMPLE_RATE, settings.preprocess_block_seconds)
+        else:
+            y = clean_waveform(y, SAMPLE_RATE)
+
+        # 16-bit samples; the container (FLAC or WAV) follows the output extension
+        sf.write(output_path, y, SAMPLE_RATE, subtype="PCM_16")
+        return output_path, y.astype(np.float32, copy=False)
+    except Exception as e:
+        logger.error(f"Audio preprocessing failed for {audio_path}: {str(e)}")
+        print(f"Error in preprocessing: {str(e)}")
+        return audio_path, None
+
+
+def clean_waveform(y: np.ndarray, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """Normalize, denoise and trim the whole signal at once with librosa/noisereduce."""
+    y = librosa.util.normalize(y)
+    y = nr.reduce_noise(y=y, sr=sr, stationary=True)
+    y, _ = librosa.effects.trim(y, top_db=TRIM_TOP_DB)
+    return y
+
+
+# Streaming mode mirrors noisereduce's stationary spectral gate (its defaults below)
+# and librosa.effects.trim, but never copies the whole call and only ever holds one
+# block's STFT in memory.
+N_FFT = 1024
+HOP_LENGTH = N_FFT // 4
+N_STD_THRESH = 1.5
+TOP_DB = 80.0
+FREQ_MASK_SMOOTH_HZ = 500
+TIME_MASK_SMOOTH_MS = 50
+# noisereduce profiles noise on its first chunk only (clip_noise_stationary) and pads each chunk
+NOISE_PROFILE_SAMPLES = 600000
+BLOCK_PAD = 30000
+TRIM_TOP_DB = 20
+TRIM_FRAME_LENGTH = 2048
+TRIM_HOP_LENGTH = 512
+
+
+def clean_waveform_streaming(y: np.ndarray, sr: int = SAMPLE_RATE, block_seconds: float = 37.5) -> np.ndarray:
+    """
+    Blockwise equivalent of clean_waveform with bounded peak memory.
+
+    The noise profile (per-frequency mean + 1.5 std in dB) is estimated once from
+    the opening of the call, then each padded block is gated against it and written
+    back in place. Trimming works on per-frame RMS computed block by block.
+    """
+    peak = max(float(y.max()), -float(y.min())) if len(y) else 0.0
+    if peak > np.finfo(np.float32).tiny:
+        y = np.divide(y, peak, dtype=np.float32)
+    else:
+        y = np.array(y, dtype=np.float32)
+
+    noise_thresh = _noise_threshold(y[:NOISE_PROFILE_SAMPLES])
+    _spectral_gate_in_place(y, sr, noise_thresh, int(block_seconds * sr))
+
+    start, end = _trim_bounds(y, int(block_seconds * sr))
+    return y[start:end]
+
+
+def _stft(segment: np.ndarray) -> np.ndarray:
+    return stft(segment, nfft=N_FFT, noverlap=N_FFT - HOP_LENGTH, nperseg=N_FFT, padded=False)[2]
+
+
+def _amp_to_db(spectrum: np.ndarray) -> np.ndarray:
+    """Magnitude in dB, floored per frequency at TOP_DB below that frequency's peak."""
+    db = 20 * np.log10(np.abs(spectrum) + np.finfo(np.float64).eps)
+    return np.maximum(db, np.max(db, axis=-1, keepdims=True) - TOP_DB)
+
+
+def _noise_threshold(noise: np.ndarray) -> np.ndarray:
+    noise_db = _amp_to_db(_stft(noise.astype(np.float64)))
+    return np.mean(noise_db, axis=1) + N_STD_THRESH * np.std(noise_db, axis=1)
+
+
+def _smoothing_filter(sr: int) -> np.ndarray:
+    n_grad_freq = int(FREQ_MASK_SMOOTH_HZ / (sr / (N_FFT / 2)))
+    n_grad_time = int(TIME_MASK_SMOOTH_MS / ((HOP_LENGTH / sr) * 1000))
+    freq = np.concatenate([np.linspace(0, 1, n_grad_freq + 1, endpoint=False), np.linspace(1, 0, n_grad_freq + 2)])[1:-1]
+    time = np.concatenate([np.linspace(0, 1, n_grad_time + 1, endpoint=False), np.linspace(1, 0, n_grad_time + 2)])[1:-1]
+    smoothing = np.outer(freq, time)
+    return smoothing / np.sum(smoothing)
+
+
+def _spectral_gate_in_place(y: np.ndarray, sr: int, noise_thresh: np.ndarray, block: int) -> None:
+    n = len(y)
+    block = min(max(block, 1), max(n, 1))
+    smoothing = _smoothing_filter(sr)
+    # Original samples left of the current block; the previous block already overwrote them in y
+    carry = None
+
+    for start in range(0, n, block):
+        end = min(start + block, n)
+        lo, hi = start - BLOCK_PAD, start + block + BLOCK_PAD
+        # Zero-padded past the signal edges, like noisereduce's chunk reader
+        segment = np.zeros(hi - lo)
+        segment[max(0, -lo): min(hi, n) - lo] = y[max(0, lo): min(hi, n)]
+        if carry is not None:
+            segment[start - len(carry) - lo: start - lo] = carry
+        carry = segment[max(0, end - BLOCK_PAD) - lo: end - lo].copy()
+
+        spectrum = _stft(segment)
+        mask = (_amp_to_db(spectrum) > noise_thresh[:, None]).astype(np.float64)
+        mask = fftconvolve(mask, smoothing, mode="same")
+        denoised = istft(spectrum * mask, nfft=N_FFT, noverlap=N_FFT - HOP_LENGTH, nperseg=N_FFT)[1]
+        y[start:end] = denoised[start - lo: end - lo]
+
+
+def _trim_bounds(y: np.ndarray, block: int) -> Tuple[int, int]:
+    """Start/end sample of the non-silent region, as librosa.effects.trim(top_db=20) finds it."""
+    n = len(y)
+    n_frames = 1 + n // TRIM_HOP_LENGTH
+    frames_per_block = max(1, block // TRIM_HOP_LENGTH)
+    half = TRIM_FRAME_LENGTH // 2
+    mse = np.empty(n_frames)
+
+    for first in range(0, n_frames, frames_per_block):
+        last = min(first + frames_per_block, n_frames)
+        # Frame k covers [k*hop - half, k*hop + half), zero-padded past the signal edges
+        lo = first * TRIM_HOP_LENGTH - half
+        hi = (last - 1) * TRIM_HOP_LENGTH + half
+        segment = np.zeros(hi - lo, dtype=np.float64)
+        segment[max(0, -lo): min(hi, n) - lo] = y[max(0, lo): min(hi, n)]
+        cumulative = np.concatenate([[0.0], np.cumsum(np.square(segment))])
+        offsets = np.arange(last - first) * TRIM_HOP_LENGTH
+        mse[first:last] = (cumulative[offsets + TRIM_FRAME_LENGTH] - cumulative[offsets]) / TRIM_FRAME_LENGTH
+
+    db = 10.0 * np.log10(np.maximum(mse, 1e-10)) - 10.0 * np.log10(max(1e-10, mse.max(initial=0.0)))
+    nonsilent = np.flatnonzero(db > -TRIM_TOP_DB)
+    if nonsilent.size == 0:
+        return 0, 0
+    return int(nonsilent[0] * TRIM_HOP_LENGTH), int(min(n, (nonsilent[-1] + 1) * TRIM_HOP_LENGTH))
@@ -6,7 +6,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy import create_engine
 from src.models.model import Base
-from src.database.database import SQLALCHEMY_DATABASE_URL
+from src.database.database import SQLALCHEMY_DATABASE_URL, apply_schema_upgrades
 
 
 logging.basicConfig(
@@ -22,6 +22,7 @@ def create_tables():
     try:
         engine = create_engine(SQLALCHEMY_DATABASE_URL)
         Base.metadata.create_all(engine)
+        apply_schema_upgrades(engine)
         logger.info("Tables created successfully!")
         return True
     except Exception as e:
@@ -0,0 +1,74 @@
+"""
+Compare decode time and peak RSS of librosa.load against decode_audio.
+
+Each decode runs in a fresh subprocess so peak RSS is not polluted by the
+other decoder or by earlier files.
+
+    python -m src.utils.decode_benchmark data/uploads/*.mp3 --repeat 3
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from statistics import median
+
+SAMPLE_RATE = 16000
+
+
+def _measure(decoder: str, path: str):
+    """Runs inside the child process and prints one JSON line."""
+    if decoder == "librosa":
+        import librosa
+        start = time.perf_counter()
+        y, _ = librosa.load(path, sr=SAMPLE_RATE)
+    else:
+        from src.utils.audio_decoder import decode_audio
+        start = time.perf_counter()
+        y = decode_audio(path, sr=SAMPLE_RATE)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is KiB on Linux; ffmpeg runs as a child, so include RUSAGE_CHILDREN
+    peak_kb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_kb / 1024, "samples": int(len(y)), "dtype": str(y.dtype)}))
+
+
+def _run(decoder: str, path: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-m", "src.utils.decode_benchmark", "--child", decoder, path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", nargs=2, metavar=("DECODER", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _measure(*args.child)
+        return
+
+    print(f"{'file':<40} {'decoder':<8} {'median s':>9} {'peak MB':>8} {'samples':>10}")
+    for path in args.files:
+        results = {}
+        for decoder in ("librosa", "decoder"):
+            runs = [_run(decoder, path) for _ in range(args.repeat)]
+            results[decoder] = runs
+            print(
+                f"{path[-40:]:<40} {decoder:<8} {median(r['seconds'] for r in runs):>9.3f} "
+                f"{max(r['peak_rss_mb'] for r in runs):>8.1f} {runs[0]['samples']:>10}"
+            )
+        speedup = median(r["seconds"] for r in results["librosa"]) / median(r["seconds"] for r in results["decoder"])
+        print(f"{'':<40} speedup x{speedup:.2f}")
+
+
+if __name__ == "__main__":
+    main()
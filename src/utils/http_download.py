@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import random
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiofiles
+import httpx
+
+from src.config.log_config import logger
+from src.config.pydantic_config import settings
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# One pooled client per event loop (the API's loop and the scheduler pipeline's loop)
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+@dataclass
+class DownloadResult:
+    status_code: int
+    bytes_written: int = 0
+    content_type: Optional[str] = None
+    sha256: Optional[str] = None
+    error_text: str = ""
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared AsyncClient (connection pool) for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                settings.download_read_timeout_seconds,
+                connect=settings.download_connect_timeout_seconds,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.download_max_connections,
+                max_keepalive_connections=settings.download_max_connections,
+            ),
+            follow_redirects=True,
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_http_client():
+    """Close the pooled client of the running event loop, if any."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    base = settings.download_backoff_seconds * (2 ** attempt)
+    return base + random.uniform(0, base / 2)
+
+
+async def stream_download(
+    url: str,
+    headers: Dict[str, str],
+    path: Path,
+    before_request: Optional[Callable[[], Awaitable[Any]]] = None,
+    on_response: Optional[Callable[[int, Any], Any]] = None,
+) -> DownloadResult:
+    """
+    Stream url to path in fixed-size chunks so memory use does not depend on file size.
+    The SHA-256 of the body is computed on the fly for content-addressed lookups.
+    Transport errors, 429 and 5xx responses are retried with exponential backoff.
+    Other non-200 responses are returned without writing the file.
+    before_request is awaited before every attempt and on_response gets each
+    response's status and headers (used for API rate limiting).
+    """
+    client = get_http_client()
+    attempt = 0
+
+    while True:
+        retry_after = None
+        if before_request is not None:
+            await before_request()
+        try:
+            async with client.stream("GET", url, headers=headers) as response:
+                if on_response is not None:
+                    on_response(response.status_code, response.headers)
+                if response.status_code == 200:
+                    bytes_written = 0
+                    digest = hashlib.sha256()
+                    async with aiofiles.open(path, "wb") as f:
+                        async for chunk in response.aiter_bytes(settings.download_chunk_size):
+                            await f.write(chunk)
+                            digest.update(chunk)
+                            bytes_written += len(chunk)
+                    return DownloadResult(
+                        status_code=200,
+                        bytes_written=bytes_written,
+                        content_type=response.headers.get("Content-Type"),
+                        sha256=digest.hexdigest(),
+                    )
+
+                body = await response.aread()
+                result = DownloadResult(
+                    status_code=response.status_code,
+                    content_type=response.headers.get("Content-Type"),
+                    error_text=body[:2000].decode("utf-8", errors="replace"),
+                )
+                retry_after = response.headers.get("Retry-After")
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= settings.download_max_retries:
+                    return result
+                reason = f"status {response.status_code}"
+        except httpx.TransportError as e:
+            if attempt >= settings.download_max_retries:
+                raise
+            reason = f"{type(e).__name__}: {e}"
+
+        delay = _backoff_delay(attempt, retry_after)
+        attempt += 1
+        logger.warning(f"Download of {url} failed ({reason}), retry {attempt}/{settings.download_max_retries} in {delay:.1f}s")
+        await asyncio.sleep(delay)
@@ -0,0 +1,86 @@
+"""
+Compare the full-signal and streaming preprocessing paths on synthetic calls.
+
+For each signal it reports wall time, peak traced memory, output length and
+the error of the streaming output against the full (noisereduce) output, and
+exits non-zero when any signal is outside the tolerance.
+
+    python -m src.utils.noise_reduction_compare --minutes 1 5 20
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.utils.audio_preprocessing import SAMPLE_RATE, clean_waveform, clean_waveform_streaming
+
+
+def synthetic_call(minutes: float, seed: int = 0, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """Alternating 'speakers' (harmonic bursts with pauses) over stationary noise, silent head and tail."""
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60 * sr)
+    t = np.arange(n) / sr
+    y = np.zeros(n, dtype=np.float32)
+
+    position = 2 * sr
+    while position < n - 2 * sr:
+        length = int(rng.uniform(0.5, 4.0) * sr)
+        end = min(position + length, n - 2 * sr)
+        f0 = rng.choice([120.0, 210.0]) * rng.uniform(0.9, 1.1)
+        envelope = np.hanning(end - position)
+        burst = sum(np.sin(2 * np.pi * f0 * k * t[position:end]) / k for k in range(1, 6))
+        y[position:end] += (0.3 * envelope * burst).astype(np.float32)
+        position = end + int(rng.uniform(0.2, 1.5) * sr)
+
+    # Stationary background hiss, colored a little with a one-pole low-pass
+    noise = rng.normal(0, 0.02, n).astype(np.float32)
+    noise[1:] += 0.5 * noise[:-1]
+    y[2 * sr: n - 2 * sr] += noise[2 * sr: n - 2 * sr]
+    return y
+
+
+def _measure(func, y: np.ndarray):
+    tracemalloc.start()
+    start = time.perf_counter()
+    out = func(y.copy())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1.0, 5.0])
+    parser.add_argument("--block-seconds", type=float, default=37.5)
+    parser.add_argument("--max-length-diff", type=float, default=0.05, help="seconds")
+    parser.add_argument("--min-snr-db", type=float, default=30.0, help="full output vs. difference")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'minutes':>7} {'path':<9} {'seconds':>8} {'peak MB':>8} {'length s':>9} {'SNR dB':>7}")
+    for i, minutes in enumerate(args.minutes):
+        y = synthetic_call(minutes, seed=i)
+        full, full_s, full_mb = _measure(lambda x: clean_waveform(x, SAMPLE_RATE), y)
+        stream, stream_s, stream_mb = _measure(
+            lambda x: clean_waveform_streaming(x, SAMPLE_RATE, args.block_seconds), y
+        )
+
+        length_diff = abs(len(full) - len(stream)) / SAMPLE_RATE
+        n = min(len(full), len(stream))
+        error = full[:n].astype(np.float64) - stream[:n]
+        snr = 10 * np.log10(np.sum(np.square(full[:n], dtype=np.float64)) / max(np.sum(np.square(error)), 1e-20))
+
+        print(f"{minutes:>7.1f} {'full':<9} {full_s:>8.2f} {full_mb:>8.1f} {len(full) / SAMPLE_RATE:>9.2f}")
+        print(f"{minutes:>7.1f} {'streaming':<9} {stream_s:>8.2f} {stream_mb:>8.1f} {len(stream) / SAMPLE_RATE:>9.2f} {snr:>7.1f}")
+        if length_diff > args.max_length_diff or snr < args.min_snr_db:
+            print(f"  outside tolerance (length diff {length_diff:.3f}s, SNR {snr:.1f} dB)")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
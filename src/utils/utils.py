@@ -7,6 +7,7 @@ import requests
 from src.schemas.schema import DiarizationSegment
 from datetime import datetime, timedelta
 from src.models.model import TokenStore
+from src.services import ringcentral
 
 def format_conversation(segments: List[Any]) -> str:
     """
@@ -120,7 +121,7 @@ def parse_mistral_response(response_text: str) -> Dict[str, Any]:
             "summary": "Could not parse structured analysis from model output"
         }
 
-def extract_score(text: str, category: str, default: int) -> int:
+def extract_score(text: str, category: str, default: int = 0) -> int:
     """
     Extract numerical score for a category from text
     """
@@ -206,7 +207,7 @@ def refresh_ringcentral_token(db: requests.Session) -> str:
         "refresh_token": token_record.refresh_token
     }
 
-    response = requests.post(token_url, headers=headers, data=data)
+    response = ringcentral.request("POST", token_url, headers=headers, data=data)
     if response.status_code != 200:
         raise Exception(f"Token refresh failed: {response.text}")
 
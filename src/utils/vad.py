@@ -0,0 +1,122 @@
+"""
+Energy-based voice activity detection and Whisper window planning.
+
+Speech regions are found from short-frame RMS energy against an adaptive
+threshold, then packed into windows of at most 30 s that only ever start and
+end inside pauses. Silence between windows is never sent to Whisper.
+"""
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+from src.config.pydantic_config import settings
+
+FRAME_SECONDS = 0.02
+
+
+@dataclass
+class SpeechPlan:
+    windows: List[Tuple[int, int]]  # (start, end) sample ranges to transcribe
+    speech_seconds: float
+    total_seconds: float
+
+    @property
+    def speech_ratio(self) -> float:
+        return self.speech_seconds / self.total_seconds if self.total_seconds else 0.0
+
+
+def frame_energy_db(audio: np.ndarray, frame: int) -> np.ndarray:
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(0)
+    frames = audio[: n_frames * frame].reshape(n_frames, frame).astype(np.float64)
+    return 10 * np.log10(np.mean(np.square(frames), axis=1) + 1e-12)
+
+
+def _runs(flags: np.ndarray) -> List[Tuple[int, int]]:
+    """(start, end) frame index pairs of consecutive True values."""
+    padded = np.concatenate([[False], flags, [False]])
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def detect_speech(audio: np.ndarray, sr: int) -> Tuple[List[Tuple[int, int]], np.ndarray]:
+    """Speech regions as (start_frame, end_frame) pairs, plus the per-frame energy in dB."""
+    frame = int(FRAME_SECONDS * sr)
+    energy = frame_energy_db(audio, frame)
+    if len(energy) == 0:
+        return [], energy
+
+    # Flat energy (digital silence, steady line noise) or a clip that never gets
+    # loud has nothing to transcribe; the cap below would otherwise mark it all speech.
+    noise_floor = np.percentile(energy, 10)
+    if energy.max() - noise_floor < settings.vad_threshold_db or energy.max() < settings.vad_min_peak_db:
+        return [], energy
+
+    # Adaptive threshold: well above the noise floor, but never so high that a
+    # call without real silence (floor = quiet speech) loses its speech frames.
+    threshold = min(noise_floor + settings.vad_threshold_db, energy.max() - 30.0)
+    speech = energy > threshold
+
+    # Bridge short pauses, then drop blips that are too short to be words
+    min_silence = int(settings.vad_min_silence_seconds / FRAME_SECONDS)
+    for start, end in _runs(~speech):
+        if 0 < start and end < len(speech) and end - start < min_silence:
+            speech[start:end] = True
+    min_speech = int(settings.vad_min_speech_seconds / FRAME_SECONDS)
+    for start, end in _runs(speech):
+        if end - start < min_speech:
+            speech[start:end] = False
+
+    pad = int(settings.vad_pad_seconds / FRAME_SECONDS)
+    regions = []
+    for start, end in _runs(speech):
+        start, end = max(0, start - pad), min(len(speech), end + pad)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions, energy
+
+
+def _split_long_region(start: int, end: int, energy: np.ndarray, max_frames: int) -> List[Tuple[int, int]]:
+    """Split a region longer than max_frames at the quietest frame near each limit."""
+    pieces = []
+    search = max(1, max_frames // 6)
+    while end - start > max_frames:
+        lo = start + max_frames - search
+        cut = lo + int(np.argmin(energy[lo: start + max_frames]))
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+
+def plan_speech_windows(audio: np.ndarray, sr: int, max_window_seconds: float = 30.0) -> SpeechPlan:
+    """Pack detected speech into windows of at most max_window_seconds, cut only in pauses."""
+    frame = int(FRAME_SECONDS * sr)
+    max_frames = int(max_window_seconds / FRAME_SECONDS)
+    regions, energy = detect_speech(audio, sr)
+
+    pieces = []
+    for start, end in regions:
+        pieces.extend(_split_long_region(start, end, energy, max_frames))
+
+    windows = []
+    for start, end in pieces:
+        if windows and end - windows[-1][0] <= max_frames:
+            windows[-1] = (windows[-1][0], end)
+        else:
+            windows.append((start, end))
+
+    # The last partial frame belongs to the final window
+    sample_windows = [(int(start) * frame, int(end) * frame) for start, end in windows]
+    if sample_windows and windows[-1][1] == len(energy):
+        sample_windows[-1] = (sample_windows[-1][0], len(audio))
+
+    return SpeechPlan(
+        windows=sample_windows,
+        speech_seconds=float(sum(end - start for start, end in regions) * FRAME_SECONDS),
+        total_seconds=len(audio) / sr,
+    )
@@ -0,0 +1,99 @@
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Phrases that mark voicemail, IVR, virtual assistants and other automated messages
+DEFAULT_INDICATORS_FILE = Path(__file__).resolve().parent.parent / "config" / "voicemail_indicators.txt"
+
+
+@dataclass(frozen=True)
+class PhraseMatch:
+    phrase: str
+    start: int
+    end: int
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over a fixed phrase list.
+    Scanning is linear in the transcript length no matter how many phrases are loaded.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        seen = set()
+        for phrase in phrases:
+            phrase = phrase.strip().lower()
+            if phrase and phrase not in seen:
+                seen.add(phrase)
+                self._add(phrase)
+        self._build_failure_links()
+
+    def _add(self, phrase: str):
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(len(self.phrases))
+        self.phrases.append(phrase)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Longer phrases first, then any shorter phrase ending at the same place
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def _scan(self, text: str):
+        state = 0
+        for position, char in enumerate(text.lower()):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._output[state]:
+                phrase = self.phrases[index]
+                yield PhraseMatch(phrase, position + 1 - len(phrase), position + 1)
+
+    def find_first(self, text: str) -> Optional[PhraseMatch]:
+        """Return the match that ends earliest in the text, or None."""
+        if not text:
+            return None
+        return next(self._scan(text), None)
+
+    def find_all(self, text: str) -> List[PhraseMatch]:
+        if not text:
+            return []
+        return list(self._scan(text))
+
+
+def load_phrases(path: Path) -> List[str]:
+    """Read one phrase per line, skipping blank lines and # comments."""
+    phrases = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                phrases.append(line)
+    return phrases
+
+
+def load_voicemail_matcher(path: Optional[str] = None) -> PhraseMatcher:
+    """Build the voicemail/IVR matcher from the given phrase file (or the bundled default)."""
+    return PhraseMatcher(load_phrases(Path(path) if path else DEFAULT_INDICATORS_FILE))
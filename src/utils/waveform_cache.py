@@ -0,0 +1,76 @@
+"""
+In-process LRU cache of preprocessed waveforms keyed by audio_id.
+
+Preprocessing already holds the cleaned 16 kHz float32 array, so it hands it
+over here; diarization then feeds the same buffer to Whisper and pyannote
+instead of decoding the *_preprocessed.wav again.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.config.log_config import logger
+from src.config.pydantic_config import settings
+
+
+class WaveformCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def put(self, audio_id: str, waveform: np.ndarray) -> None:
+        waveform = np.ascontiguousarray(waveform, dtype=np.float32)
+        if not self.enabled or waveform.nbytes > self.max_bytes:
+            return
+        # Callers must not mutate a cached buffer
+        waveform.setflags(write=False)
+
+        with self._lock:
+            previous = self._items.pop(audio_id, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._items[audio_id] = waveform
+            self._bytes += waveform.nbytes
+
+            while self._bytes > self.max_bytes:
+                evicted_id, evicted = self._items.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._stats["evictions"] += 1
+                logger.debug(f"Evicted waveform {evicted_id} from cache")
+
+    def get(self, audio_id: str) -> Optional[np.ndarray]:
+        with self._lock:
+            waveform = self._items.get(audio_id)
+            if waveform is None:
+                self._stats["misses"] += 1
+                return None
+            self._items.move_to_end(audio_id)
+            self._stats["hits"] += 1
+            return waveform
+
+    def discard(self, audio_id: str) -> None:
+        with self._lock:
+            waveform = self._items.pop(audio_id, None)
+            if waveform is not None:
+                self._bytes -= waveform.nbytes
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+waveform_cache = WaveformCache(int(settings.waveform_cache_max_mb * 2**20))
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from src.utils.audio_preprocessing import SAMPLE_RATE, clean_waveform, clean_waveform_streaming
+from src.utils.noise_reduction_compare import synthetic_call
+
+MAX_LENGTH_DIFF_SECONDS = 0.05
+
+
+def _snr_db(reference: np.ndarray, estimate: np.ndarray) -> float:
+    n = min(len(reference), len(estimate))
+    error = reference[:n].astype(np.float64) - estimate[:n]
+    signal_energy = np.sum(np.square(reference[:n], dtype=np.float64))
+    return 10 * np.log10(signal_energy / max(np.sum(np.square(error)), 1e-20))
+
+
+@pytest.fixture(scope="module")
+def call_and_full_output():
+    # 90 s is longer than noisereduce's 600000-sample chunk, so both paths chunk the signal
+    y = synthetic_call(1.5, seed=1)
+    return y, clean_waveform(y.copy(), SAMPLE_RATE)
+
+
+@pytest.mark.parametrize(
+    "block_seconds, min_snr_db",
+    [
+        # The default block matches noisereduce's own chunking, so the outputs agree to float precision
+        (37.5, 100.0),
+        # Other block sizes place the chunk seams elsewhere; the difference stays well below the signal
+        (20.0, 30.0),
+        (60.0, 30.0),
+    ],
+)
+def test_streaming_matches_full_path(call_and_full_output, block_seconds, min_snr_db):
+    y, full = call_and_full_output
+    stream = clean_waveform_streaming(y.copy(), SAMPLE_RATE, block_seconds)
+
+    assert abs(len(full) - len(stream)) / SAMPLE_RATE <= MAX_LENGTH_DIFF_SECONDS
+    assert _snr_db(full, stream) >= min_snr_db
+
+
+def test_streaming_handles_short_and_silent_input():
+    silent = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    out = clean_waveform_streaming(silent, SAMPLE_RATE)
+    assert np.all(np.isfinite(out))
+
+    short = synthetic_call(0.1, seed=2)
+    stream = clean_waveform_streaming(short.copy(), SAMPLE_RATE)
+    full = clean_waveform(short.copy(), SAMPLE_RATE)
+    assert abs(len(full) - len(stream)) / SAMPLE_RATE <= MAX_LENGTH_DIFF_SECONDS
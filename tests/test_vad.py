@@ -0,0 +1,32 @@
+import numpy as np
+
+from src.utils.vad import detect_speech, plan_speech_windows
+
+SR = 16000
+
+
+def _bursts(seconds: float, seed: int = 0) -> np.ndarray:
+    """Alternating 1 s tones and 1 s pauses over a faint noise floor."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SR)) / SR
+    y = 0.001 * rng.standard_normal(len(t))
+    y += np.where(np.floor(t) % 2 == 0, 0.3 * np.sin(2 * np.pi * 220 * t), 0.0)
+    return y.astype(np.float32)
+
+
+def test_digital_silence_has_no_speech():
+    plan = plan_speech_windows(np.zeros(5 * SR, dtype=np.float32), SR)
+    assert plan.windows == []
+    assert plan.speech_ratio == 0.0
+
+
+def test_steady_line_noise_has_no_speech():
+    noise = 0.05 * np.random.default_rng(1).standard_normal(5 * SR).astype(np.float32)
+    regions, _ = detect_speech(noise, SR)
+    assert regions == []
+
+
+def test_speech_bursts_are_detected():
+    plan = plan_speech_windows(_bursts(6.0), SR)
+    assert plan.windows
+    assert 0.4 <= plan.speech_ratio <= 0.7
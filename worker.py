@@ -0,0 +1,81 @@
+"""
+Inference worker: consumes diarize/analyze jobs from the inference_jobs queue.
+
+Run one or more alongside the API (INFERENCE_MODE=queue), on this host or
+others sharing the database and the ./data volume:
+
+    python worker.py                    # all job kinds
+    python worker.py --kinds diarize    # ASR/diarization only
+    python worker.py --once             # drain the queue and exit
+"""
+import argparse
+import os
+import signal
+import socket
+import threading
+
+from src.config.log_config import logger
+from src.config.pydantic_config import settings
+from src.database.database import SessionLocal
+from src.routes.audio import serving_models
+from src.services.job_queue import JOB_KINDS, claim_job, run_job
+from src.services.model_registry import model_registry
+from src.services.pipeline import JOB_HANDLERS
+
+stop_event = threading.Event()
+
+
+def _request_stop(signal_received, frame):
+    logger.info("Stop requested, finishing the current job...")
+    stop_event.set()
+
+
+def run_worker(worker_id: str, kinds, poll_seconds: float, once: bool = False):
+    db = SessionLocal()
+    try:
+        while not stop_event.is_set():
+            try:
+                job = claim_job(db, worker_id, kinds)
+            except Exception as e:
+                logger.error(f"Failed to claim a job: {str(e)}")
+                db.rollback()
+                stop_event.wait(poll_seconds)
+                continue
+
+            if job is None:
+                if once:
+                    break
+                stop_event.wait(poll_seconds)
+                continue
+
+            logger.info(f"Worker {worker_id} picked up {job.kind} job {job.id} (attempt {job.attempts})")
+            run_job(db, job, JOB_HANDLERS)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kinds", nargs="+", choices=JOB_KINDS, default=list(JOB_KINDS))
+    parser.add_argument("--poll-seconds", type=float, default=settings.job_poll_seconds)
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    parser.add_argument("--no-warm-up", action="store_true", help="load models on the first job instead of at start")
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    if not args.no_warm_up:
+        # The voicemail precheck model is only used by the scheduler, not by jobs
+        names = [name for name in serving_models() if name != settings.voicemail_precheck_model]
+        load_times = model_registry.warm_up(names)
+        logger.info(f"Worker {worker_id} loaded models: {', '.join(f'{k} {v:.1f}s' for k, v in load_times.items())}")
+
+    logger.info(f"Worker {worker_id} consuming {', '.join(args.kinds)} jobs")
+    run_worker(worker_id, args.kinds, args.poll_seconds, once=args.once)
+    logger.info(f"Worker {worker_id} stopped")
+
+
+if __name__ == "__main__":
+    main()